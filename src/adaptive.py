@@ -0,0 +1,220 @@
+"""
+Adaptive difficulty.
+
+Every question belongs to an item family (a word group for Word Meaning, and a
+structural variant such as "negated statement" or "3 matching pairs" for the other
+tasks). The user has an Elo rating per task and each family has its own rating; both
+are updated in O(1) after every answer. Rated families sit in fixed-width rating
+buckets, and word groups that have never been answered form an implicit pool at the
+default rating, so choosing an item near the target difficulty is a constant-time
+lookup no matter how large the lexicon is. A generated question is then built in the
+chosen family directly, so rare variants are served as often as they are chosen.
+"""
+import json
+import math
+import os
+
+from config import CONFIG
+
+DEFAULT_RATING = 1500.0
+BUCKET_WIDTH = 50.0
+BUCKET_MIN = 700.0
+BUCKET_COUNT = 32
+MAX_GENERATE_TRIES = 25  # Draws when looking for a word group that has never been rated
+MAX_GAP = 13  # Distances from the middle number are 2-15, so they differ by at most 13
+RATINGS_VERSION = 2
+
+# Structural variants for the generated tasks. Word Meaning uses one family per word group.
+GENERATED_FAMILIES = {
+    'Reasoning': ['plain', 'negated'],
+    'Perceptual Speed': [f"matches={n}" for n in range(5)],
+    'Number Speed & Accuracy': [f"gap={n}" for n in range(1, 7)],
+    'Spatial Visualisation': [f"matches={n}" for n in range(3)],
+}
+
+
+def item_family(question):
+    """Maps a generated question to its family name."""
+    q_type = question.type
+    if q_type == 'Reasoning':
+        return 'negated' if ' not as ' in question.statement else 'plain'
+    if q_type in ('Perceptual Speed', 'Spatial Visualisation'):
+        return f"matches={question.answer}"
+    if q_type == 'Number Speed & Accuracy':
+        low, mid, high = sorted(question.options)
+        # The closer the two distances from the middle number, the harder the question.
+        return f"gap={min(abs((mid - low) - (high - mid)), 6)}"
+    if q_type == 'Word Meaning':
+        return str(question.item)
+    raise ValueError(f"Unknown question type {q_type!r}")
+
+
+def generate_in_family(factory, task_name, family):
+    """Builds a generated question of ``task_name`` that belongs to ``family``."""
+    if task_name == 'Reasoning':
+        return factory.generate_reasoning(negated=family == 'negated')
+    value = family.split('=')[1]
+    if task_name == 'Perceptual Speed':
+        return factory.generate_perceptual_speed(matches=int(value))
+    if task_name == 'Spatial Visualisation':
+        return factory.generate_spatial_visualisation(matches=int(value))
+    if task_name == 'Number Speed & Accuracy':
+        gap = int(value)
+        # The last family collects every larger gap, as in ``item_family``.
+        if gap == 6:
+            gap = factory.rng.randint(6, MAX_GAP)
+        return factory.generate_number_speed(gap=gap)
+    raise ValueError(f"Unknown generated task {task_name!r}")
+
+
+def expected_score(user_rating, item_rating):
+    return 1.0 / (1.0 + 10 ** ((item_rating - user_rating) / 400.0))
+
+
+def _bucket_of(rating):
+    return min(BUCKET_COUNT - 1, max(0, int((rating - BUCKET_MIN) // BUCKET_WIDTH)))
+
+
+class DifficultyIndex:
+    """Families of one task grouped into rating buckets, with O(1) insert, move and removal."""
+
+    def __init__(self):
+        self._buckets = [[] for _ in range(BUCKET_COUNT)]
+        self._where = {}  # family -> (bucket, position)
+
+    def place(self, family, rating):
+        bucket = _bucket_of(rating)
+        current = self._where.get(family)
+        if current is not None:
+            if current[0] == bucket:
+                return
+            self._remove(family)
+        self._where[family] = (bucket, len(self._buckets[bucket]))
+        self._buckets[bucket].append(family)
+
+    def _remove(self, family):
+        bucket, pos = self._where.pop(family)
+        items = self._buckets[bucket]
+        last = items.pop()
+        if pos < len(items):
+            items[pos] = last
+            self._where[last] = (bucket, pos)
+
+    def pick(self, rating, rng):
+        """
+        A random family from the bucket nearest ``rating`` that has any, with its
+        distance in buckets. Returns ``(None, None)`` if the index is empty.
+        """
+        target = _bucket_of(rating)
+        for offset in range(BUCKET_COUNT):
+            for bucket in (target - offset, target + offset):
+                if 0 <= bucket < BUCKET_COUNT and self._buckets[bucket]:
+                    return rng.choice(self._buckets[bucket]), offset
+        return None, None
+
+
+class AdaptiveEngine:
+    """Chooses questions near the user's level and keeps user and item ratings up to date."""
+
+    def __init__(self, factory, path=None):
+        self.factory = factory
+        self.path = path or CONFIG["files"]["ratings"]
+        self.settings = CONFIG["adaptive"]
+        self.user_ratings = {}
+        self.item_ratings = {}  # (task_name, family) -> [rating, answers]
+        self._indexes = {}
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != RATINGS_VERSION:
+            return
+        self.user_ratings = {task: float(r) for task, r in data.get('users', {}).items()}
+        for task_name, items in data.get('items', {}).items():
+            for family, (rating, answers) in items.items():
+                self.item_ratings[(task_name, family)] = [float(rating), int(answers)]
+
+    def save(self):
+        """Writes ratings; families still at their default rating are left out to keep the file small."""
+        items = {}
+        for (task_name, family), (rating, answers) in self.item_ratings.items():
+            if answers:
+                items.setdefault(task_name, {})[family] = [round(rating, 1), answers]
+        data = {'version': RATINGS_VERSION, 'users': {t: round(r, 1) for t, r in self.user_ratings.items()}, 'items': items}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving ratings: {e}")
+
+    # --- Selection ---
+
+    def _index(self, task_name):
+        index = self._indexes.get(task_name)
+        if index is None:
+            index = DifficultyIndex()
+            if task_name == 'Word Meaning':
+                # Only word groups that have been answered are placed; the rest stay implicit.
+                families = [family for task, family in self.item_ratings if task == task_name]
+            else:
+                families = GENERATED_FAMILIES[task_name]
+            for family in families:
+                index.place(family, self._item(task_name, family)[0])
+            self._indexes[task_name] = index
+        return index
+
+    def _item(self, task_name, family):
+        key = (task_name, family)
+        if key not in self.item_ratings:
+            self.item_ratings[key] = [DEFAULT_RATING, 0]
+        return self.item_ratings[key]
+
+    def user_rating(self, task_name):
+        return self.user_ratings.get(task_name, DEFAULT_RATING)
+
+    def target_rating(self, task_name):
+        """The item rating at which the user's expected success equals ``target_success``."""
+        p = self.settings["target_success"]
+        return self.user_rating(task_name) - 400.0 * math.log10(p / (1.0 - p))
+
+    def next_question(self, task_name):
+        rng = self.factory.rng
+        target = self.target_rating(task_name) + rng.gauss(0, BUCKET_WIDTH)
+        family, distance = self._index(task_name).pick(target, rng)
+        if task_name == 'Word Meaning':
+            return self.factory.word_meaning_from_group(self._pick_word_group(target, family, distance))
+        return generate_in_family(self.factory, task_name, family)
+
+    def _pick_word_group(self, target, family, distance):
+        """Prefers an unrated word group when the default rating is at least as close to the target."""
+        n_groups = len(self.factory.word_groups)
+        if family is None or abs(_bucket_of(target) - _bucket_of(DEFAULT_RATING)) <= distance:
+            for _ in range(MAX_GENERATE_TRIES):
+                item = self.factory.rng.randrange(n_groups)
+                if ('Word Meaning', str(item)) not in self.item_ratings:
+                    return item
+        return int(family) if family is not None else self.factory.rng.randrange(n_groups)
+
+    # --- Rating updates ---
+
+    def record(self, question, is_correct):
+        """Elo update of the user and the question's family after one answer."""
+        task_name = question.type
+        family = item_family(question)
+        item = self._item(task_name, family)
+        user = self.user_rating(task_name)
+        surprise = (1.0 if is_correct else 0.0) - expected_score(user, item[0])
+
+        self.user_ratings[task_name] = user + self.settings["user_k"] * surprise
+        item[0] -= self.settings["item_k"] * surprise
+        item[1] += 1
+        if task_name in self._indexes:
+            self._indexes[task_name].place(family, item[0])
@@ -0,0 +1,187 @@
+"""
+Cohort analytics over many candidates' log directories.
+
+Every directory under the root that holds a summary log (see ``CONFIG["files"]``) is
+treated as one candidate. Directories are reduced to per-task statistics in a process
+pool, and the per-candidate results are cached under their file fingerprint so that a
+re-run only re-reads candidates whose logs changed.
+
+Usage:
+    python src/cohort.py ROOT [--workers N] [--csv percentiles.csv]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import log_shards
+from config import CONFIG
+
+CACHE_FILE = '.gia_cohort_cache.json'
+CACHE_VERSION = 1
+METRICS = ['accuracy', 'seconds_per_question', 'adjusted_score']
+PERCENTILES = [10, 25, 50, 75, 90]
+
+
+def discover(root):
+    """Returns every directory under ``root`` that contains a summary log or one of its shards."""
+    summary_name = CONFIG["files"]["summary_log"]
+    stem, ext = os.path.splitext(summary_name)
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        if any(f == summary_name or (f.startswith(stem + '.') and f.endswith('.shard' + ext)) for f in filenames):
+            found.append(dirpath)
+    return sorted(found)
+
+
+def fingerprint(directory):
+    """Size and modification time of the summary log and its shards."""
+    path = os.path.join(directory, CONFIG["files"]["summary_log"])
+    parts = []
+    for p in [path] + log_shards.list_shards(path):
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            continue
+        parts.append(f"{os.path.basename(p)}:{st.st_size}:{st.st_mtime_ns}")
+    return '|'.join(parts)
+
+
+def summarise_candidate(directory):
+    """Reduces one candidate's summary log to ``{task: {attempts, <metric>_mean, best_adjusted_score}}``."""
+    path = os.path.join(directory, CONFIG["files"]["summary_log"])
+    totals = {}
+    for row in log_shards.iter_rows(path):
+        try:
+            values = [float(row[m]) for m in METRICS]
+        except (KeyError, TypeError, ValueError):
+            continue
+        task = totals.setdefault(row['task_name'], {'attempts': 0, 'sums': [0.0] * len(METRICS), 'best': -math.inf})
+        task['attempts'] += 1
+        task['sums'] = [s + v for s, v in zip(task['sums'], values)]
+        task['best'] = max(task['best'], values[METRICS.index('adjusted_score')])
+
+    summary = {}
+    for task_name, task in totals.items():
+        entry = {'attempts': task['attempts'], 'best_adjusted_score': task['best']}
+        for metric, total in zip(METRICS, task['sums']):
+            entry[f"{metric}_mean"] = total / task['attempts']
+        summary[task_name] = entry
+    return summary
+
+
+def _summarise_job(job):
+    directory, fp = job
+    return directory, fp, summarise_candidate(directory)
+
+
+def _load_cache(root):
+    try:
+        with open(os.path.join(root, CACHE_FILE)) as f:
+            cache = json.load(f)
+        return cache['candidates'] if cache.get('version') == CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _save_cache(root, candidates):
+    path = os.path.join(root, CACHE_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'candidates': candidates}, f)
+    os.replace(tmp, path)
+
+
+def collect(root, workers=None):
+    """
+    Returns ``({relative_dir: summary}, n_reread)``. Only directories whose fingerprint
+    changed since the last run are read again.
+    """
+    cache = _load_cache(root)
+    directories = discover(root)
+    results, stale = {}, []
+    for directory in directories:
+        key = os.path.relpath(directory, root)
+        fp = fingerprint(directory)
+        cached = cache.get(key)
+        if cached and cached['fingerprint'] == fp:
+            results[key] = cached['summary']
+        else:
+            stale.append((directory, fp))
+
+    updated = {key: cache[key] for key in results}
+    if stale:
+        if workers == 1 or len(stale) == 1:
+            done = list(map(_summarise_job, stale))
+        else:
+            chunksize = max(1, len(stale) // (4 * (workers or os.cpu_count() or 1)))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                done = list(pool.map(_summarise_job, stale, chunksize=chunksize))
+        for directory, fp, summary in done:
+            key = os.path.relpath(directory, root)
+            results[key] = summary
+            updated[key] = {'fingerprint': fp, 'summary': summary}
+    _save_cache(root, updated)
+    return results, len(stale)
+
+
+def _percentile(sorted_values, pct):
+    """Linear-interpolation percentile of an already sorted list."""
+    if not sorted_values:
+        return math.nan
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def percentile_table(results):
+    """
+    Builds cohort distributions from the per-candidate summaries.
+    Returns rows of ``{task_name, metric, candidates, p10 ... p90}``.
+    """
+    columns = {}
+    for summary in results.values():
+        for task_name, entry in summary.items():
+            for metric in [f"{m}_mean" for m in METRICS] + ['best_adjusted_score']:
+                columns.setdefault((task_name, metric), []).append(entry[metric])
+
+    table = []
+    for (task_name, metric), values in sorted(columns.items()):
+        values.sort()
+        row = {'task_name': task_name, 'metric': metric, 'candidates': len(values)}
+        for pct in PERCENTILES:
+            row[f"p{pct}"] = _percentile(values, pct)
+        table.append(row)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate many candidates' GIA logs into cohort percentile tables.")
+    parser.add_argument('root')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument('--csv', default=None, help="Also write the percentile table to this CSV file.")
+    args = parser.parse_args(argv)
+
+    results, reread = collect(args.root, args.workers)
+    table = percentile_table(results)
+    print(f"{len(results)} candidates ({reread} re-read, {len(results) - reread} from cache).")
+
+    header = ['task_name', 'metric', 'candidates'] + [f"p{p}" for p in PERCENTILES]
+    print(f"{'Task':<26}{'Metric':<30}{'N':>6}" + ''.join(f"{h:>10}" for h in header[3:]))
+    for row in table:
+        print(f"{row['task_name']:<26}{row['metric']:<30}{row['candidates']:>6}"
+              + ''.join(f"{row[h]:>10.2f}" for h in header[3:]))
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=header)
+            writer.writeheader()
+            writer.writerows(table)
+
+
+if __name__ == "__main__":
+    main()
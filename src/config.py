@@ -23,6 +23,24 @@ CONFIG = {
     "files": {
         "results_log": 'gia_practice_log.csv',
         "summary_log": 'gia_summary_log.csv',
+        "ratings": 'gia_ratings.json',
+        "journal": 'gia_session.journal',
+        "review": 'gia_review.queue',
+    },
+    "progress_max_points": 1000,  # Each series on the progress screen is downsampled to at most this many points
+    "sync": {
+        "url": None,       # e.g. "http://results.example.org:8766"; None disables syncing
+        "interval": 60,    # Seconds between background sync passes
+        "batch_size": 500, # Rows per compressed upload
+    },
+    "review": {
+        "intervals": [600, 86400, 3 * 86400, 7 * 86400, 21 * 86400],  # Seconds until each successive review of a missed item
+        "max_items": 2000,  # Per task; beyond this the items due last are dropped
+    },
+    "adaptive": {
+        "target_success": 0.7,  # Items are picked so the expected chance of a correct answer is about this
+        "user_k": 32,           # Elo step size for the user's rating
+        "item_k": 16,           # Elo step size for item ratings
     },
     # The 'colors' dict is replaced by SELECTED_THEME
     "fonts": {
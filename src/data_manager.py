@@ -1,60 +1,88 @@
-import os
 import csv
-import json
 from datetime import datetime
 import pandas as pd
 
+import log_shards
+from history_index import HistoryIndex
+from records import AnswerRecord
+from rollups import Rollups
+
 class DataManager:
-    """Handles reading from and writing to CSV log files."""
-    def __init__(self, results_log, summary_log):
+    """
+    Handles reading from and writing to CSV log files.
+
+    Writes go to this process's shard of each log (see ``log_shards``) so that several
+    instances can share a directory; reads see the canonical logs and all shards as one.
+    """
+    def __init__(self, results_log, summary_log, debug_log='gia_debug_log.csv'):
         self.results_log = results_log
         self.summary_log = summary_log
-        self.debug_log = 'gia_debug_log.csv'
+        self.debug_log = debug_log
         self._setup_logging()
+        self.history_index = HistoryIndex(summary_log)
+        self.rollups = Rollups(summary_log)
+
+    RESULTS_HEADER = ['timestamp', 'task_name', 'is_correct', 'time_taken_ms']
+    SUMMARY_HEADER = [
+        'timestamp', 'task_name', 'total_questions', 'correct_questions',
+        'accuracy', 'seconds_per_question', 'adjusted_score', 'session_seed'
+    ]
+    DEBUG_HEADER = [
+        'timestamp', 'task_name', 'question_details', 'selected_answer',
+        'correct_answer', 'time_taken_ms', 'is_correct', 'session_seed', 'question_index'
+    ]
 
     def _setup_logging(self):
-        if not os.path.exists(self.results_log):
-            with open(self.results_log, 'w', newline='') as f:
-                csv.writer(f).writerow(['timestamp', 'task_name', 'is_correct', 'time_taken_ms'])
-        
-        if not os.path.exists(self.summary_log):
-            with open(self.summary_log, 'w', newline='') as f:
-                csv.writer(f).writerow([
-                    'timestamp', 'task_name', 'total_questions', 'correct_questions',
-                    'accuracy', 'seconds_per_question', 'adjusted_score' # <<< ADDED
-                ])
+        for path, header in ((self.results_log, self.RESULTS_HEADER),
+                             (self.summary_log, self.SUMMARY_HEADER),
+                             (self.debug_log, self.DEBUG_HEADER)):
+            try:
+                # Exclusive create, so two processes starting together cannot both write a header.
+                with open(path, 'x', newline='') as f:
+                    csv.writer(f).writerow(header)
+            except FileExistsError:
+                self._upgrade_header(path, header)
 
-        if not os.path.exists(self.debug_log):
-            with open(self.debug_log, 'w', newline='') as f:
-                csv.writer(f).writerow([
-                    'timestamp', 'task_name', 'question_details', 'selected_answer',
-                    'correct_answer', 'time_taken_ms', 'is_correct'
-                ])
+    def _upgrade_header(self, path, header):
+        """Rewrites a log written by an older version so that it has any newly added columns."""
+        with open(path, newline='') as f:
+            old_header = next(csv.reader(f), None)
+            if not old_header or old_header == header or not set(old_header) < set(header):
+                return
+            rows = [dict(zip(old_header, row)) for row in csv.reader(f)]
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for record in rows:
+                writer.writerow([record.get(col, '') for col in header])
 
-    def log_debug_event(self, task_name, question_data, selected_answer, correct_answer, time_ms, is_correct):
+    def log_debug_event(self, task_name, question_data, selected_answer, correct_answer, time_ms, is_correct,
+                        session_seed=None, question_index=None):
         """Logs a highly detailed record of a single question event for debugging."""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Use json.dumps to serialize the entire question dictionary into a string
-        question_details_str = json.dumps(question_data)
 
-        with open(self.debug_log, 'a', newline='') as f:
-            csv.writer(f).writerow([
-                timestamp,
-                task_name,
-                question_details_str,
-                selected_answer,
-                correct_answer,
-                f"{time_ms:.2f}",
-                is_correct
-            ])
+        log_shards.append_rows(self.debug_log, self.DEBUG_HEADER, [[
+            timestamp,
+            task_name,
+            question_data.to_json(),
+            selected_answer,
+            correct_answer,
+            f"{time_ms:.2f}",
+            is_correct,
+            '' if session_seed is None else session_seed,
+            '' if question_index is None else question_index
+        ]])
 
     def log_question_result(self, task_name, is_correct, time_taken_ms):
+        self.log_question_results([AnswerRecord(task_name, is_correct, time_taken_ms)])
+
+    def log_question_results(self, records):
+        """Appends many ``AnswerRecord``s (or ``(task_name, is_correct, time_taken_ms)`` tuples) with a single file open."""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open(self.results_log, 'a', newline='') as f:
-            csv.writer(f).writerow([timestamp, task_name, int(is_correct), f"{time_taken_ms:.2f}"])
+        log_shards.append_rows(self.results_log, self.RESULTS_HEADER,
+                               (AnswerRecord(*record).to_csv_row(timestamp) for record in records))
 
-    def log_summary_stats(self, task_name, total, correct, duration, wrong_penalty):
+    def log_summary_stats(self, task_name, total, correct, duration, wrong_penalty, session_seed=None):
         if total == 0:
             return None
             
@@ -66,27 +94,46 @@ class DataManager:
         adjusted_score = correct + (wrong_count * wrong_penalty)
         
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with open(self.summary_log, 'a', newline='') as f:
-            csv.writer(f).writerow([
-                timestamp, task_name, total, correct, f"{accuracy:.2f}",
-                f"{seconds_per_question:.3f}", f"{adjusted_score:.2f}" # <<< ADDED
-            ])
+        row_bytes = log_shards.append_rows(self.summary_log, self.SUMMARY_HEADER, [[
+            timestamp, task_name, total, correct, f"{accuracy:.2f}",
+            f"{seconds_per_question:.3f}", f"{adjusted_score:.2f}",
+            '' if session_seed is None else session_seed
+        ]])
         
+        # Index the values exactly as written so that a rebuild from the log gives the same ranks.
+        logged = {
+            'accuracy': round(accuracy, 2),
+            'seconds_per_question': round(seconds_per_question, 3),
+            'adjusted_score': round(adjusted_score, 2),
+        }
+        self.history_index.add(task_name, logged, row_bytes)
+        self.rollups.add(task_name, timestamp, logged, row_bytes)
+
         return {
             'accuracy': accuracy,
             'spq': seconds_per_question,
-            'adjusted_score': adjusted_score
+            'adjusted_score': adjusted_score,
+            'ranks': {metric: self.history_index.rank(task_name, metric, value) for metric, value in logged.items()}
         }
 
+    def compact(self):
+        """Merges this process's shards, and those of exited processes, into the canonical logs."""
+        for path, header in ((self.results_log, self.RESULTS_HEADER),
+                             (self.summary_log, self.SUMMARY_HEADER),
+                             (self.debug_log, self.DEBUG_HEADER)):
+            try:
+                log_shards.compact(path, header)
+            except OSError as e:
+                print(f"Error compacting {path}: {e}")
+
     def load_summary_data(self):
-        if not os.path.exists(self.summary_log): return pd.DataFrame()
         try:
-            df = pd.read_csv(self.summary_log)
+            df = pd.DataFrame(list(log_shards.iter_rows(self.summary_log)))
             if df.empty: return pd.DataFrame()
-            df['accuracy'] = pd.to_numeric(df['accuracy'], errors='coerce')
-            df['seconds_per_question'] = pd.to_numeric(df['seconds_per_question'], errors='coerce')
+            for col in ['total_questions', 'correct_questions', 'accuracy', 'seconds_per_question', 'adjusted_score']:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
             df.dropna(subset=['accuracy', 'seconds_per_question'], inplace=True)
             return df
         except Exception as e:
             print(f"Error loading summary data: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
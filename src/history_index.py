@@ -0,0 +1,134 @@
+"""
+Order-statistics index over the summary history.
+
+Keeps one sorted ``array('d')`` per (task, metric) so that the rank of an attempt
+among all logged attempts is a binary search rather than a sort of the whole log.
+The index is persisted next to the summary log as a small JSON header followed by
+the raw arrays, and is rebuilt from the log whenever it no longer matches it.
+
+The stored fingerprint is that of the rows the index actually holds, and it is only
+carried forward by the bytes of rows this process added itself; if the log has grown
+by anything else (another process's shard), the index is rebuilt rather than saved.
+"""
+import bisect
+import json
+import os
+from array import array
+
+import log_shards
+
+METRICS = ['accuracy', 'seconds_per_question', 'adjusted_score']
+HIGHER_IS_BETTER = {'accuracy': True, 'seconds_per_question': False, 'adjusted_score': True}
+INDEX_VERSION = 1
+
+
+def log_fingerprint(summary_log):
+    """
+    Bytes of row data in the summary log and its shards. Compaction moves rows between
+    these files without changing the total, so the index survives it.
+    """
+    total = 0
+    for path in [summary_log] + log_shards.list_shards(summary_log):
+        try:
+            with open(path, 'rb') as f:
+                header = f.readline()
+                f.seek(0, os.SEEK_END)
+                total += f.tell() - len(header)
+        except FileNotFoundError:
+            continue
+    return total
+
+
+class HistoryIndex:
+    """Sorted per-task metric values with O(log n) rank lookups."""
+
+    def __init__(self, summary_log):
+        self.summary_log = summary_log
+        self.path = os.path.splitext(summary_log)[0] + '.index'
+        self._values = {}
+        self.fingerprint = None
+        if not self._load():
+            self.rebuild()
+
+    def _series(self, task_name, metric):
+        key = (task_name, metric)
+        if key not in self._values:
+            self._values[key] = array('d')
+        return self._values[key]
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                fingerprint = log_fingerprint(self.summary_log)
+                if header.get('version') != INDEX_VERSION or header.get('fingerprint') != fingerprint:
+                    return False
+                values = {}
+                for task_name, metric, length in header['series']:
+                    series = array('d')
+                    series.fromfile(f, length)
+                    values[(task_name, metric)] = series
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        self._values, self.fingerprint = values, fingerprint
+        return True
+
+    def save(self):
+        header = {
+            'version': INDEX_VERSION,
+            'fingerprint': self.fingerprint,
+            'series': [[task_name, metric, len(series)] for (task_name, metric), series in self._values.items()],
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(json.dumps(header).encode() + b'\n')
+                for series in self._values.values():
+                    series.tofile(f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving history index: {e}")
+
+    def rebuild(self):
+        """Re-reads the whole summary history. Only needed when the persisted index is missing or stale."""
+        # Taken before reading, so rows appended meanwhile make the index look stale, never current.
+        self.fingerprint = log_fingerprint(self.summary_log)
+        self._values = {}
+        for row in log_shards.iter_rows(self.summary_log):
+            for metric in METRICS:
+                try:
+                    self._series(row['task_name'], metric).append(float(row[metric]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        for key, series in self._values.items():
+            self._values[key] = array('d', sorted(series))
+        self.save()
+
+    def add(self, task_name, values, row_bytes):
+        """
+        Inserts one attempt's ``{metric: value}``, just logged as ``row_bytes`` bytes of
+        row data, and persists the index. Rebuilds instead if other rows were logged meanwhile.
+        """
+        expected = self.fingerprint + row_bytes
+        if log_fingerprint(self.summary_log) != expected:
+            self.rebuild()
+            return
+        for metric in METRICS:
+            if metric in values:
+                bisect.insort(self._series(task_name, metric), float(values[metric]))
+        self.fingerprint = expected
+        self.save()
+
+    def rank(self, task_name, metric, value):
+        """
+        Returns ``(rank, total)`` where rank 1 is the best logged attempt. Ties share the
+        better rank. ``total`` is 0 when there is no history for the task.
+        """
+        series = self._values.get((task_name, metric))
+        if not series:
+            return 0, 0
+        if HIGHER_IS_BETTER[metric]:
+            better = len(series) - bisect.bisect_right(series, value)
+        else:
+            better = bisect.bisect_left(series, value)
+        return better + 1, len(series)
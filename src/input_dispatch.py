@@ -0,0 +1,130 @@
+"""
+Single input-routing layer for answering questions.
+
+``InputDispatcher`` binds key presses and left-button presses once, for the whole
+application, and routes them through lookup tables that are swapped for each
+question: option buttons map to option indices, and digit keys map to options
+(by value when every option is a single digit, otherwise by position starting at 1).
+Left/Right arrows move a highlight between the options and Space or Return picks the
+highlighted one. Space or a click outside a button also acts as "continue" when a
+question is waiting on that.
+
+Answers are timestamped from the input event's own ``event.time``, converted to the
+``time.perf_counter`` clock, so recorded latencies do not include the time Tk took to
+get round to the callback. Input stamped before the current options were shown (keys
+pressed ahead while the question was still being built) is ignored, so it can neither
+answer a question the user had not seen nor produce a negative response time.
+"""
+import time
+
+RECALIBRATE_MS = 1000  # A larger jump between the clocks means the X server time wrapped or the clock changed
+EVENT_TIME_RESOLUTION = 0.001  # Seconds; X event times are whole milliseconds
+
+
+def digits_by_value(options):
+    """True when digit keys pick options by value (every option is 0-9) rather than by position."""
+    return all(isinstance(o, int) and 0 <= o <= 9 for o in options)
+
+
+class InputDispatcher:
+    def __init__(self, root, highlight=None):
+        self.highlight = highlight or (lambda button, on: None)
+        self._on_answer = None
+        self._on_continue = None
+        self._options = []
+        self._buttons = []
+        self._by_widget = {}
+        self._by_key = {}
+        self._focus = None
+        self._shown_at = 0.0
+        self._clock_offset = None
+        root.bind_all('<KeyPress>', self._on_key)
+        root.bind_all('<ButtonPress-1>', self._on_click)
+
+    # --- Routing tables ---
+
+    def show_options(self, options, buttons, on_answer):
+        """Routes input to ``on_answer(option, event_time)`` until the next call or ``clear``."""
+        self.clear()
+        self._options, self._buttons, self._on_answer = list(options), list(buttons), on_answer
+        self._shown_at = time.perf_counter()
+        self._by_widget = {str(button): i for i, button in enumerate(buttons)}
+        by_value = digits_by_value(options)
+        for i, option in enumerate(options):
+            digit = str(option if by_value else i + 1)
+            if len(digit) == 1:
+                self._by_key[digit] = self._by_key[f"KP_{digit}"] = i
+
+    def wait_for_continue(self, on_continue):
+        """Routes the next Space or click outside a button to ``on_continue()``."""
+        self.clear()
+        self._on_continue = on_continue
+
+    def clear(self):
+        self._on_answer = self._on_continue = self._focus = None
+        self._options, self._buttons = [], []
+        self._by_widget, self._by_key = {}, {}
+
+    @property
+    def option_buttons(self):
+        """The buttons of the question currently taking answers (empty otherwise)."""
+        return tuple(self._buttons)
+
+    @property
+    def awaiting_continue(self):
+        return self._on_continue is not None
+
+    # --- Event handling ---
+
+    def event_time(self, event):
+        """The ``time.perf_counter()`` value at which ``event`` happened."""
+        now_ms = time.perf_counter() * 1000
+        if not event.time:
+            return now_ms / 1000
+        offset = now_ms - event.time
+        # The smallest offset seen is the one with the least callback delay in it.
+        if self._clock_offset is None or offset < self._clock_offset or offset - self._clock_offset > RECALIBRATE_MS:
+            self._clock_offset = offset
+        return (event.time + self._clock_offset) / 1000
+
+    def _answer(self, index, event):
+        on_answer, option = self._on_answer, self._options[index]
+        answered_at = self.event_time(event)
+        if answered_at < self._shown_at - EVENT_TIME_RESOLUTION:
+            return  # Queued before these options were on screen.
+        answered_at = max(answered_at, self._shown_at)
+        self.clear()
+        on_answer(option, answered_at)
+
+    def _continue(self):
+        on_continue = self._on_continue
+        self.clear()
+        on_continue()
+
+    def _move_focus(self, step):
+        if self._focus is not None:
+            self.highlight(self._buttons[self._focus], False)
+            self._focus = (self._focus + step) % len(self._buttons)
+        else:
+            self._focus = 0 if step > 0 else len(self._buttons) - 1
+        self.highlight(self._buttons[self._focus], True)
+
+    def _on_key(self, event):
+        key = event.keysym
+        if self._on_continue and key in ('space', 'Return'):
+            self._continue()
+        elif self._on_answer:
+            if key in self._by_key:
+                self._answer(self._by_key[key], event)
+            elif key in ('Left', 'Right'):
+                self._move_focus(1 if key == 'Right' else -1)
+            elif key in ('space', 'Return') and self._focus is not None:
+                self._answer(self._focus, event)
+
+    def _on_click(self, event):
+        if self._on_answer:
+            index = self._by_widget.get(str(event.widget))
+            if index is not None:
+                self._answer(index, event)
+        elif self._on_continue and getattr(event.widget, 'winfo_class', str)() != 'Button':
+            self._continue()
@@ -0,0 +1,103 @@
+"""
+Minimal JSON-over-HTTP/1.1 server on ``asyncio`` streams.
+
+Shared by the multi-candidate test server and the sync reference server. Subclasses
+implement ``route``; request bodies may be gzip-compressed.
+"""
+import asyncio
+import gzip
+import inspect
+import json
+import zlib
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+            429: 'Too Many Requests', 503: 'Service Unavailable'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class JsonHttpServer:
+    """Keep-alive connection handling; ``route(method, path, body)`` returns a JSON-able dict (or awaitable)."""
+
+    max_body_bytes = 4096
+
+    def route(self, method, path, body):
+        raise NotImplementedError
+
+    async def start(self):
+        """Called once the event loop is running, before connections are accepted."""
+
+    async def stop(self):
+        """Called when the server shuts down."""
+
+    def _decode_body(self, raw, headers):
+        if headers.get('content-encoding', '').lower() == 'gzip':
+            decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+            raw = decompressor.decompress(raw, self.max_body_bytes + 1)
+            if len(raw) > self.max_body_bytes or decompressor.unconsumed_tail:
+                raise HttpError(413, "request body too large")
+        body = json.loads(raw) if raw else {}
+        if not isinstance(body, dict):
+            raise HttpError(400, "body must be a JSON object")
+        return body
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                extra_headers = {}
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                    length = int(headers.get('content-length', 0))
+                    if length > self.max_body_bytes:
+                        raise HttpError(413, "request body too large")
+                    raw = await reader.readexactly(length) if length else b''
+                    payload = self.route(method, path, self._decode_body(raw, headers))
+                    if inspect.isawaitable(payload):
+                        payload = await payload
+                    status = 200
+                except HttpError as e:
+                    status, payload, extra_headers = e.status, {'error': e.message}, e.headers
+                except (ValueError, UnicodeDecodeError, OSError, EOFError, gzip.BadGzipFile, zlib.error):
+                    status, payload = 400, {'error': "malformed request"}
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+                head += ''.join(f"{name}: {value}\r\n" for name, value in extra_headers.items())
+                writer.write(head.encode() + b'\r\n' + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        await self.start()
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"Serving on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.stop()
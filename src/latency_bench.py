@@ -0,0 +1,213 @@
+"""
+End-to-end input-to-paint latency benchmark for the desktop app.
+
+Launches the real ``GiaApp`` (under Xvfb when there is no display), runs a practice
+session of every task type and answers each question with a scripted click or key
+press injected through ``event_generate``. For every answer it measures the time from
+queuing the input event until the next question has been drawn, i.e. until the event
+has been handled and ``update_idletasks`` has finished the layout and redraw. For
+Reasoning, pressing Space on the statement to reveal the options is measured as well.
+
+Results are printed and written as JSON with the same layout on every run, so runs
+from different commits can be compared with ``--compare``.
+
+Usage:
+    python src/latency_bench.py [--questions 200] [--output latency.json] [--compare before.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from config import CONFIG
+from input_dispatch import digits_by_value
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+XVFB_START_TIMEOUT = 5.0
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def summarise(samples):
+    """Distribution of a list of latencies in milliseconds."""
+    values = sorted(samples)
+    if not values:
+        return {'n': 0}
+    return {
+        'n': len(values),
+        'mean': round(sum(values) / len(values), 3),
+        'p50': round(_percentile(values, 50), 3),
+        'p90': round(_percentile(values, 90), 3),
+        'p99': round(_percentile(values, 99), 3),
+        'max': round(values[-1], 3),
+    }
+
+
+def start_xvfb():
+    """Starts a private Xvfb server and points DISPLAY at it. Returns the process."""
+    if shutil.which('Xvfb') is None:
+        sys.exit("No display available and Xvfb is not installed.")
+    display = next(n for n in range(99, 1000) if not os.path.exists(f"/tmp/.X{n}-lock"))
+    process = subprocess.Popen(['Xvfb', f":{display}", '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + XVFB_START_TIMEOUT
+    while not os.path.exists(f"/tmp/.X11-unix/X{display}"):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            sys.exit(f"Xvfb failed to start on :{display}.")
+        time.sleep(0.05)
+    os.environ['DISPLAY'] = f":{display}"
+    return process
+
+
+def _event_time():
+    """An X event timestamp on the ``perf_counter`` clock, as the input dispatcher expects."""
+    return int(time.perf_counter() * 1000) & 0xFFFFFFFF
+
+
+def _timed(app, inject):
+    start = time.perf_counter()
+    inject()
+    app.update()             # Deliver the input event; the handler builds the next question.
+    app.update_idletasks()   # Finish geometry and redraw so the question is fully drawn.
+    return (time.perf_counter() - start) * 1000
+
+
+def _click(button):
+    def inject():
+        button.event_generate('<ButtonPress-1>', x=button.winfo_width() // 2, y=button.winfo_height() // 2,
+                              time=_event_time(), when='tail')
+    return inject
+
+
+def _key(app, keysym):
+    def inject():
+        app.event_generate('<KeyPress>', keysym=keysym, time=_event_time(), when='tail')
+    return inject
+
+
+def bench_task(app, task_name, questions, warmup, seed, rng):
+    """Answers ``warmup + questions`` questions of one task, alternating clicks and keys."""
+    samples = {'click': [], 'key': [], 'continue': []}
+    app.settings["task_durations"][task_name] = 24 * 3600  # The task timer must not end the run.
+    app.start_practice_session(task_name)
+    app.factory.new_session(seed)
+    app.update()
+    app.start_current_task()
+    app.update()
+
+    for i in range(warmup + questions):
+        if app.input.awaiting_continue:
+            latency = _timed(app, _key(app, 'space'))
+            if i >= warmup:
+                samples['continue'].append(latency)
+
+        buttons = app.input.option_buttons
+        options = app.current_question.options
+        choice = rng.randrange(len(buttons))
+        if i % 2 == 0:
+            kind, inject = 'click', _click(buttons[choice])
+        else:
+            keysym = str(options[choice]) if digits_by_value(options) else str(choice + 1)
+            kind, inject = 'key', _key(app, keysym)
+        latency = _timed(app, inject)
+        if i >= warmup:
+            samples[kind].append(latency)
+
+    app._go_back_to_menu()
+    app.update()
+    return {kind: summarise(values) for kind, values in samples.items() if values}
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(questions, warmup, seed):
+    # Import after DISPLAY is set; the app's logs go to a throwaway directory.
+    from main import GiaApp
+    workdir = tempfile.mkdtemp(prefix='gia-latency-')
+    os.chdir(workdir)
+    app = GiaApp()
+    app.update()
+    # Generated key events go to the focus window, so the app must have focus.
+    app.focus_force()
+    app.update()
+    rng = random.Random(seed)
+    try:
+        results = {task: bench_task(app, task, questions, warmup, seed, rng) for task in CONFIG["task_durations"]}
+        tk_version = app.tk.call('info', 'patchlevel')
+    finally:
+        app._on_closing()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'tk': tk_version,
+        'questions_per_task': questions,
+        'warmup': warmup,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def print_report(report, baseline=None):
+    print(f"Input-to-paint latency (ms), commit {report['commit']}, {report['questions_per_task']} questions per task")
+    for task_name, kinds in report['results'].items():
+        for kind, stats in kinds.items():
+            line = f"  {task_name:26s} {kind:8s} p50 {stats['p50']:7.2f}  p90 {stats['p90']:7.2f}  p99 {stats['p99']:7.2f}  max {stats['max']:7.2f}"
+            before = (baseline or {}).get('results', {}).get(task_name, {}).get(kind)
+            if before:
+                line += f"   (p50 {stats['p50'] - before['p50']:+.2f}, p90 {stats['p90'] - before['p90']:+.2f} vs {baseline.get('commit')})"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure input-to-paint latency of the GIA app with scripted input.")
+    parser.add_argument('--questions', type=int, default=200, help="Measured answers per task type.")
+    parser.add_argument('--warmup', type=int, default=10, help="Answers per task type to discard first.")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='latency_bench.json')
+    parser.add_argument('--compare', help="An earlier JSON report to show differences against.")
+    parser.add_argument('--xvfb', action='store_true', help="Use a private Xvfb server even if DISPLAY is set.")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output)
+
+    xvfb = start_xvfb() if args.xvfb or not os.environ.get('DISPLAY') else None
+    try:
+        report = run(args.questions, args.warmup, args.seed)
+    finally:
+        if xvfb:
+            xvfb.terminate()
+            xvfb.wait()
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report, baseline)
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Memory-mapped item lexicons.
+
+A lexicon is a UTF-8 text file with one tab-separated entry per line (``#`` lines are
+comments). Next to it sits ``<file>.idx``, an array of native-endian uint64 byte
+offsets, one per entry. Both files are memory-mapped, so opening a lexicon costs the
+same whatever its size and fetching entry ``i`` is a single slice of the map.
+"""
+import mmap
+import os
+from array import array
+from collections.abc import Sequence
+
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons')
+
+_OFFSET_SIZE = 8
+
+
+def build_index(path):
+    """Scans ``path`` once and returns the start offset of every entry line."""
+    offsets = array('Q')
+    position = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip() and not line.startswith(b'#'):
+                offsets.append(position)
+            position += len(line)
+    return offsets
+
+
+class Lexicon(Sequence):
+    """Read-only, randomly accessible view of a lexicon file. Entries are tuples of strings."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = self._map(path)
+        self._offsets = self._load_index()
+
+    @staticmethod
+    def _map(path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self):
+        index_path = self.path + '.idx'
+        try:
+            if os.path.getmtime(index_path) >= os.path.getmtime(self.path):
+                offsets = self._map(index_path)
+                if len(offsets) % _OFFSET_SIZE == 0:
+                    return memoryview(offsets).cast('Q') if offsets else array('Q')
+        except OSError:
+            pass
+
+        # Missing or out of date: rebuild, and keep it for next time if the directory is writable.
+        offsets = build_index(self.path)
+        tmp = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                offsets.tofile(f)
+            os.replace(tmp, index_path)
+        except OSError as e:
+            print(f"Could not save lexicon index {index_path}: {e}")
+        return offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start = self._offsets[i]
+        end = self._data.find(b'\n', start)
+        line = self._data[start:end if end != -1 else len(self._data)]
+        return tuple(line.decode('utf-8').rstrip('\r').split('\t'))
+
+
+def open_lexicon(name):
+    """Opens one of the bundled lexicons in ``LEXICON_DIR`` by file name."""
+    return Lexicon(os.path.join(LEXICON_DIR, name))
+
+
+class IndexDeck:
+    """
+    A shuffled deck of the indices ``0 .. n-1`` dealt lazily (a sparse Fisher-Yates
+    shuffle). Dealing is O(1) and memory grows only with the number of cards dealt,
+    so neither the item list nor a permutation of it is ever materialised.
+    """
+
+    def __init__(self, n, rng):
+        self.n = n
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        self.remaining = self.n
+        self._moved = {}
+
+    def __len__(self):
+        return self.remaining
+
+    def deal(self):
+        i = self.rng.randrange(self.remaining)
+        last = self.remaining - 1
+        card = self._moved.get(i, i)
+        # Move the last undealt card into the dealt slot.
+        self._moved[i] = self._moved.pop(last, last)
+        self.remaining -= 1
+        return card
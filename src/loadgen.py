@@ -0,0 +1,115 @@
+"""
+Load generator for the multi-candidate test server.
+
+Simulates many candidates, each working through one task with a random think time
+per question, and reports request latency percentiles.
+
+Usage:
+    python src/server.py &
+    python src/loadgen.py --candidates 200 --think 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from config import CONFIG
+
+
+class Client:
+    """A keep-alive HTTP/1.1 connection speaking the server's JSON API."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+        )
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run_candidate(index, args, latencies, outcomes):
+    rng = random.Random(index)
+    client = Client(args.host, args.port)
+    await client.connect()
+    try:
+        task_name = args.task or rng.choice(list(CONFIG["task_durations"]))
+        started = time.perf_counter()
+        status, reply = await client.request('POST', '/sessions',
+                                             {'candidate': f"load-{index:05d}", 'task_name': task_name})
+        latencies.append(time.perf_counter() - started)
+        if status != 200:
+            outcomes['rejected'] += 1
+            return
+        session_id = reply['session_id']
+        while True:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think))
+            answer = rng.choice(reply['question']['options'])
+            started = time.perf_counter()
+            status, reply = await client.request('POST', f"/sessions/{session_id}/answer", {'answer': answer})
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                outcomes['errors'] += 1
+                return
+            if reply['finished']:
+                outcomes['finished'] += 1
+                return
+    finally:
+        await client.close()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+async def run(args):
+    latencies = []
+    outcomes = {'finished': 0, 'rejected': 0, 'errors': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_candidate(i, args, latencies, outcomes) for i in range(args.candidates)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{args.candidates} candidates, {len(latencies)} requests in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.0f} req/s)")
+    print(f"Finished: {outcomes['finished']}, rejected: {outcomes['rejected']}, errors: {outcomes['errors']}")
+    print("Latency ms: " + ", ".join(f"p{p} {_percentile(latencies, p) * 1000:.2f}" for p in (50, 90, 99, 100)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many candidates against the test server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--candidates', type=int, default=200)
+    parser.add_argument('--think', type=float, default=0.2, help="Mean seconds between answers.")
+    parser.add_argument('--task', default=None, help="Task to run (default: random per candidate).")
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
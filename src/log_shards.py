@@ -0,0 +1,300 @@
+"""
+Per-process log shards.
+
+Every process appends to its own shard next to the canonical CSV
+(``gia_summary_log.<host>-<pid>.shard.csv`` for ``gia_summary_log.csv``), so several
+app instances can share a working directory without locking on the write path.
+``compact`` merges shards into the canonical file in timestamp order, and
+``iter_rows`` presents the canonical file and all shards as a single log.
+
+Shards are reopened for every append, so a shard that has been renamed away by the
+compactor is simply recreated by its owner on the next write. Only shards that no
+other process can still be writing are merged: this process's own, and those of
+processes on this host that have exited. A write that was already under way when a
+shard was claimed is picked up before the claimed file is removed.
+
+Usage:
+    python src/log_shards.py LOG.csv [LOG.csv ...]
+"""
+import argparse
+import csv
+import ctypes
+import glob
+import heapq
+import os
+import socket
+import time
+
+STALE_LOCK_SECONDS = 10 * 60
+
+
+def process_owner():
+    """Identifies the current process in shard names. Evaluated per call so forked workers get their own shard."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def shard_path(path, owner=None):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{owner or process_owner()}.shard{ext}"
+
+
+def shard_owner(path, shard):
+    """The ``(host, pid)`` that a shard of ``path`` belongs to, or ``None`` if its name is not one of ours."""
+    stem, ext = os.path.splitext(path)
+    owner = shard[len(stem) + 1:-len(f".shard{ext}")]
+    host, _, pid = owner.rpartition('-')
+    return (host, int(pid)) if host and pid.isdigit() else None
+
+
+def _pid_exists(pid):
+    if os.name == 'nt':
+        # os.kill on Windows terminates the process, so ask for a handle instead.
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.windll.kernel32.GetLastError() != 87  # ERROR_INVALID_PARAMETER: no such process
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _owner_exited(path, shard):
+    """True only when the shard's owner is known to have exited; shards of other hosts are never claimed."""
+    owner = shard_owner(path, shard)
+    return owner is not None and owner[0] == socket.gethostname() and not _pid_exists(owner[1])
+
+
+def list_shards(path):
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(stem)}.*.shard{glob.escape(ext)}"))
+
+
+def append_rows(path, header, rows):
+    """
+    Appends rows to this process's shard of ``path``, writing the header if the shard
+    is new. Returns the number of bytes of row data written (the header not included).
+    """
+    with open(shard_path(path), 'a', newline='') as f:
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(header)
+        start = f.tell()
+        writer.writerows(rows)
+        return f.tell() - start
+
+
+def _read(path):
+    try:
+        with open(path, newline='') as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def _read_from(path, offset, fieldnames=None):
+    """
+    Rows of a claimed shard from byte ``offset`` (a line start) up to its last complete
+    line. Returns ``(rows, end_offset, fieldnames)``; the header is read when ``offset`` is 0.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset, fieldnames
+    data = data[:data.rfind(b'\n') + 1]  # A write still in progress is left for the next read.
+    lines = data.decode('utf-8').splitlines(keepends=True)
+    reader = csv.DictReader(lines, fieldnames=fieldnames)
+    rows = list(reader)
+    return rows, offset + len(data), reader.fieldnames
+
+
+def _header_of(path):
+    try:
+        with open(path, newline='') as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+
+def iter_rows(path):
+    """Yields the rows of the canonical log and all of its shards as dicts, in timestamp order."""
+    sources = [_read(path)] + [_read(shard) for shard in list_shards(path)]
+    return heapq.merge(*sources, key=lambda row: row.get('timestamp') or '')
+
+
+def _read_since(path, timestamp):
+    """
+    Rows of a canonical (timestamp-sorted) log with ``timestamp >= timestamp``. The
+    start is found by bisecting on byte offsets, so only the tail of the file is parsed.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        header = f.readline()
+        target = timestamp.encode()
+        lo = f.tell()
+        f.seek(0, os.SEEK_END)
+        hi = f.tell()
+        # Invariant: every line starting before ``lo`` is older than ``timestamp``.
+        while hi - lo > 4096:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # Skip the partial line.
+            line_start = f.tell()
+            line = f.readline()
+            if not line or line_start >= hi:
+                hi = mid
+            elif line[:len(target)] < target:
+                lo = f.tell()
+            else:
+                hi = mid
+        f.seek(lo)  # Always the start of a line.
+        lines = [header] + f.read().splitlines(keepends=True)
+    rows = csv.DictReader(line.decode('utf-8') for line in lines)
+    return [row for row in rows if (row.get('timestamp') or '') >= timestamp]
+
+
+def iter_rows_since(path, timestamp):
+    """Like ``iter_rows``, but only rows with ``timestamp >= timestamp``, without parsing the older part of the log."""
+    sources = [_read_since(path, timestamp)]
+    for shard in list_shards(path):
+        sources.append([row for row in _read(shard) if (row.get('timestamp') or '') >= timestamp])
+    return heapq.merge(*sources, key=lambda row: row.get('timestamp') or '')
+
+
+def _last_timestamp(path):
+    """Reads the timestamp of the last row without scanning the whole file."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 8192))
+            lines = [line for line in f.read().splitlines() if line.strip()]
+    except FileNotFoundError:
+        return None
+    if not lines:
+        return None
+    first_field = lines[-1].decode('utf-8', 'replace').split(',', 1)[0].strip('"')
+    return None if first_field == 'timestamp' else first_field
+
+
+def _acquire_lock(path):
+    lock = f"{path}.lock"
+    try:
+        if time.time() - os.path.getmtime(lock) > STALE_LOCK_SECONDS:
+            os.remove(lock)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return lock
+    except FileExistsError:
+        return None
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _merge_rows(path, header, new_rows):
+    new_rows.sort(key=lambda row: row.get('timestamp') or '')
+    last = _last_timestamp(path)
+    if last is None or (new_rows[0].get('timestamp') or '') >= last:
+        # Common case: everything new is later than the canonical log, so append.
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(header)
+            writer.writerows([row.get(col, '') for col in header] for row in new_rows)
+    else:
+        merged = heapq.merge(_read(path), new_rows, key=lambda row: row.get('timestamp') or '')
+        tmp = f"{path}.{process_owner()}.tmp"
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows([row.get(col, '') for col in header] for row in merged)
+        os.replace(tmp, path)
+
+
+def compact(path, header, wait=5.0):
+    """
+    Merges this process's shard of ``path``, and those of exited processes, into the
+    canonical log. Returns the number of rows merged, or ``None`` if another process
+    held the compaction lock for longer than ``wait`` seconds.
+    """
+    deadline = time.monotonic() + wait
+    lock = _acquire_lock(path)
+    while lock is None:
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+        lock = _acquire_lock(path)
+    try:
+        own = shard_path(path)
+        shards = [s for s in list_shards(path) if s == own or _owner_exited(path, s)]
+        # Shards claimed by a compaction that never finished are picked up again.
+        stem, ext = os.path.splitext(path)
+        claimed = glob.glob(f"{glob.escape(stem)}.*.shard{glob.escape(ext)}.merging")
+        if not shards and not claimed:
+            return 0
+
+        # Take the shards out of the write path before reading them.
+        for shard in shards:
+            target = f"{shard}.merging"
+            try:
+                os.replace(shard, target)
+                claimed.append(target)
+            except FileNotFoundError:
+                pass
+
+        # An append that opened a shard before it was claimed still lands in the claimed
+        # file, so keep reading from where the last pass stopped until the files stop
+        # changing. A torn last line left by a crashed writer never completes and is dropped.
+        progress = {shard: (0, None) for shard in claimed}
+        merged, sizes = 0, None
+        while True:
+            new_rows = []
+            for shard, (offset, fieldnames) in progress.items():
+                rows, offset, fieldnames = _read_from(shard, offset, fieldnames)
+                new_rows += rows
+                progress[shard] = (offset, fieldnames)
+            if new_rows:
+                _merge_rows(path, header, new_rows)
+                merged += len(new_rows)
+            previous, sizes = sizes, [_size(shard) for shard in progress]
+            if sizes == [offset for offset, _ in progress.values()] or (not new_rows and sizes == previous):
+                break
+            time.sleep(0.01)
+
+        for shard in claimed:
+            os.remove(shard)
+        return merged
+    finally:
+        os.remove(lock)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge per-process log shards into their canonical CSV logs.")
+    parser.add_argument('logs', nargs='+')
+    args = parser.parse_args(argv)
+    for log in args.logs:
+        header = next(filter(None, (_header_of(p) for p in [log] + list_shards(log))), None)
+        if header is None:
+            print(f"{log}: nothing to compact.")
+            continue
+        merged = compact(log, header)
+        print(f"{log}: " + ("another process is compacting." if merged is None else f"merged {merged} rows."))
+
+
+if __name__ == "__main__":
+    main()
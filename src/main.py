@@ -1,16 +1,27 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import tkinter.font as tkFont
 import time
 import copy
 import json
+from datetime import date
 from PIL import Image, ImageDraw, ImageFont, ImageTk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from config import CONFIG, SELECTED_THEME
+from config import CONFIG, SELECTED_THEME, THEME_NAME
 from data_manager import DataManager
+from input_dispatch import InputDispatcher, digits_by_value
+import log_shards
+from adaptive import AdaptiveEngine
 from question_factory import QuestionFactory
+from records import TaskTally
+from review_queue import ReviewQueue
+from rollups import METRICS, downsample_lttb
+from scoring import question_bank_size, score_task
+from session_journal import SessionJournal
+from sync import LogSyncer
+from themes import THEMES
 from ui_helpers import ScrollableFrame
 
 class GiaApp(tk.Tk):
@@ -23,18 +34,26 @@ class GiaApp(tk.Tk):
         # State Management
         self.settings = copy.deepcopy(CONFIG) # <<< Use a mutable copy for settings
         self.settings['debug_logging_enabled'] = False # Default to off
+        self.settings['adaptive_enabled'] = False
         self.factory = QuestionFactory()
+        self.adaptive = AdaptiveEngine(self.factory)
+        self.review = ReviewQueue()
         self.data_manager = DataManager(
             CONFIG["files"]["results_log"],
             CONFIG["files"]["summary_log"]
         )
+        # Fold in shards left behind by instances that exited without compacting.
+        self.data_manager.compact()
+        self.journal = SessionJournal(CONFIG["files"]["journal"])
+        self.syncer = LogSyncer(self.data_manager, CONFIG["sync"]["url"]).start() if CONFIG["sync"]["url"] else None
         self.question_bank_size = 0
         self.questions_answered_in_task = 0
         self.is_practice_mode = False
+        self.is_review_mode = False
         self.current_task_name = None
         self.current_question = None
         self.question_start_time = 0
-        self.current_task_results = []
+        self.task_tally = TaskTally()
         self.series_results = []
         self.task_order = []
         self.current_task_index = -1
@@ -42,13 +61,35 @@ class GiaApp(tk.Tk):
         self._task_timer_id, self._update_timer_id = None, None
         self.timer_label, self.task_frame = None, None
         self.spatial_images = []
+        # All answer input goes through one dispatcher, bound once for the lifetime of the app.
+        self.input = InputDispatcher(self, highlight=self._highlight_option)
 
         self.duration_entries = {}
         self.debug_log_var = tk.BooleanVar()
+        self.adaptive_var = tk.BooleanVar()
+        self.settings['theme_name'] = THEME_NAME
+        self.theme_var = tk.StringVar(value=THEME_NAME)
+
+        # Cached screens: built once, then hidden and shown instead of being rebuilt.
+        self._screens = {}
+        self._current_screen = None
+        self._themed_widgets = []
+        self._stats_dirty = True
+        self._screen_builders = {
+            'welcome': self._build_welcome_screen,
+            'settings': self._build_settings_screen,
+            'intro': self._build_intro_screen,
+        }
+        self._screen_refreshers = {
+            'welcome': self._refresh_welcome_screen,
+            'settings': self._refresh_settings_screen,
+            'intro': self._refresh_intro_screen,
+        }
 
         self._configure_window()
         self.create_welcome_screen()
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
+        self._offer_resume()
 
     def _configure_window(self):
         self.title("GIA Practice Tool")
@@ -56,86 +97,183 @@ class GiaApp(tk.Tk):
         self.configure(bg=self.theme["app_bg"])
 
     def _clear_frame(self, frame=None):
+        """Destroys transient widgets. Cached screens are only hidden, never destroyed."""
         target = frame if frame else self
+        cached = set(self._screens.values())
         for widget in target.winfo_children():
-            widget.destroy()
+            if widget in cached:
+                widget.pack_forget()
+            else:
+                widget.destroy()
+        if frame is None:
+            self._current_screen = None
+
+    # --- Screen Management ---
+
+    def _show_screen(self, name):
+        """Hides whatever is displayed and brings up a cached screen, building it on first use."""
+        self._clear_frame()
+        if name not in self._screens:
+            self._screens[name] = self._screen_builders[name]()
+        self._screen_refreshers[name]()
+        screen = self._screens[name]
+        screen.pack(expand=True, fill='both')
+        screen.tkraise()
+        self._current_screen = name
+
+    def _themed(self, widget, role):
+        """Registers a widget of a cached screen so apply_theme can restyle it in place."""
+        self._themed_widgets.append((widget, role))
+        self._style_widget(widget, role)
+        return widget
+
+    def _style_widget(self, widget, role):
+        t = self.theme
+        if role == 'frame':
+            widget.configure(bg=t["app_bg"])
+        elif role == 'label':
+            widget.configure(bg=t["app_bg"], fg=t["label_fg"])
+        elif role == 'note':
+            widget.configure(bg=t["app_bg"])
+        elif role == 'button':
+            widget.configure(bg=t["button_bg"], fg=t["button_fg"], activebackground=t["button_active_bg"], activeforeground=t["button_fg"])
+        elif role == 'check':
+            widget.configure(bg=t["app_bg"], fg=t["label_fg"], activebackground=t["app_bg"], selectcolor=t["app_bg"])
+
+    def apply_theme(self, theme_name):
+        """Switches the colour theme with a single restyle pass over the cached screens."""
+        self.theme = THEMES.get(theme_name, THEMES["Default"])
+        self.settings['theme_name'] = theme_name
+        self.configure(bg=self.theme["app_bg"])
+        for widget, role in self._themed_widgets:
+            self._style_widget(widget, role)
 
     # --- UI Creation Methods ---
 
     def create_welcome_screen(self):
-        self._clear_frame()
-        
-        main_frame = tk.Frame(self, bg=self.theme["app_bg"])
+        self._show_screen('welcome')
+
+    def _build_welcome_screen(self):
+        screen = self._themed(tk.Frame(self), 'frame')
+        main_frame = self._themed(tk.Frame(screen), 'frame')
         main_frame.pack(expand=True, pady=20)
 
         # Settings button
-        settings_button = tk.Button(self, text="⚙️ Settings", font=CONFIG["fonts"]["small"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', command=self.create_settings_screen)
+        settings_button = self._themed(tk.Button(screen, text="⚙️ Settings", font=CONFIG["fonts"]["small"], relief='flat', command=self.create_settings_screen), 'button')
         settings_button.place(relx=1.0, rely=0.0, x=-15, y=15, anchor='ne')
 
-        tk.Label(main_frame, text="GIA Practice Tool", font=CONFIG["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 20))
-        tk.Label(main_frame, text="Take a full, timed test series to log your performance.", font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=5)
+        progress_button = self._themed(tk.Button(screen, text="📈 Progress", font=CONFIG["fonts"]["small"], relief='flat', command=self._show_progress_screen), 'button')
+        progress_button.place(relx=0.0, rely=0.0, x=15, y=15, anchor='nw')
+
+        self._themed(tk.Label(main_frame, text="GIA Practice Tool", font=CONFIG["fonts"]["title"]), 'label').pack(pady=(0, 20))
+        self._themed(tk.Label(main_frame, text="Take a full, timed test series to log your performance.", font=CONFIG["fonts"]["header"]), 'label').pack(pady=5)
         
-        tk.Button(main_frame, text="Start Full Test Series", font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=self.start_series).pack(pady=15)
+        self._themed(tk.Button(main_frame, text="Start Full Test Series", font=CONFIG["fonts"]["button"], relief='flat', padx=20, pady=10, command=self.start_series), 'button').pack(pady=15)
         
         ttk.Separator(main_frame, orient='horizontal').pack(fill='x', padx=100, pady=20)
 
         practice_label = "Or, Practice a Single Task (results are not logged):"
-        tk.Label(main_frame, text=practice_label, font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=5)
+        self._themed(tk.Label(main_frame, text=practice_label, font=CONFIG["fonts"]["header"]), 'label').pack(pady=5)
         
-        practice_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
+        practice_frame = self._themed(tk.Frame(main_frame), 'frame')
         practice_frame.pack(pady=10)
         
+        # Each task also gets a Review button for the questions it is due to repeat.
+        self._review_buttons = {}
         for i, task_name in enumerate(CONFIG["task_durations"].keys()):
-            btn = tk.Button(practice_frame, text=task_name, font=CONFIG["fonts"]["small"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=10, pady=5, command=lambda name=task_name: self.start_practice_session(name))
+            btn = self._themed(tk.Button(practice_frame, text=task_name, font=CONFIG["fonts"]["small"], relief='flat', padx=10, pady=5, command=lambda name=task_name: self.start_practice_session(name)), 'button')
             btn.grid(row=i, column=0, padx=5, pady=5)
+            review_btn = self._themed(tk.Button(practice_frame, font=CONFIG["fonts"]["small"], relief='flat', padx=10, pady=5, command=lambda name=task_name: self.start_practice_session(name, review=True)), 'button')
+            review_btn.grid(row=i, column=1, padx=5, pady=5)
+            self._review_buttons[task_name] = review_btn
+
+        # The averages are the only dynamic part of this screen; they live in their own frame.
+        self._stats_frame = self._themed(tk.Frame(main_frame), 'frame')
+        self._stats_frame.pack(fill='x')
+        return screen
+
+    def _refresh_welcome_screen(self):
+        """Updates the due-review counts, and rebuilds the average-performance block only when the summary log has changed."""
+        now = time.time()
+        for task_name, button in self._review_buttons.items():
+            button.config(text=f"Review ({self.review.due_count(task_name, now)} due)")
+        if not self._stats_dirty:
+            return
+        self._stats_dirty = False
+        stale = set(self._stats_frame.winfo_children())
+        self._themed_widgets = [(w, r) for w, r in self._themed_widgets if w not in stale]
+        for widget in stale:
+            widget.destroy()
 
         summary_df = self.data_manager.load_summary_data()
-        if not summary_df.empty:
-            ### FIX: Replace the faulty tk.Frame with a proper ttk.Separator ###
-            ttk.Separator(main_frame, orient='horizontal').pack(fill='x', padx=100, pady=20)
-            
-            avg_performance = summary_df.groupby('task_name')[['accuracy', 'seconds_per_question']].mean().reset_index()
-            
-            tk.Label(main_frame, text="Average Logged Performance:", font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 5))
-            for _, row in avg_performance.iterrows():
-                text = (f"{row['task_name']}: Avg Accuracy {row['accuracy']:.1f}%, "
-                        f"Avg Time/Q {row['seconds_per_question']:.3f} s/Q")
-                tk.Label(main_frame, text=text, font=CONFIG["fonts"]["small"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack()
+        if summary_df.empty:
+            return
+        ttk.Separator(self._stats_frame, orient='horizontal').pack(fill='x', padx=100, pady=20)
+
+        avg_performance = summary_df.groupby('task_name')[['accuracy', 'seconds_per_question']].mean().reset_index()
+
+        self._themed(tk.Label(self._stats_frame, text="Average Logged Performance:", font=CONFIG["fonts"]["header"]), 'label').pack(pady=(0, 5))
+        for _, row in avg_performance.iterrows():
+            text = (f"{row['task_name']}: Avg Accuracy {row['accuracy']:.1f}%, "
+                    f"Avg Time/Q {row['seconds_per_question']:.3f} s/Q")
+            self._themed(tk.Label(self._stats_frame, text=text, font=CONFIG["fonts"]["small"]), 'label').pack()
 
     def create_settings_screen(self):
-        self._clear_frame()
-        main_frame = tk.Frame(self, bg=self.theme["app_bg"])
+        self._show_screen('settings')
+
+    def _build_settings_screen(self):
+        screen = self._themed(tk.Frame(self), 'frame')
+        main_frame = self._themed(tk.Frame(screen), 'frame')
         main_frame.pack(expand=True, pady=20)
         
-        tk.Label(main_frame, text="Settings", font=CONFIG["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 30))
+        self._themed(tk.Label(main_frame, text="Settings", font=CONFIG["fonts"]["title"]), 'label').pack(pady=(0, 30))
 
         # --- Task Duration Settings ---
-        tk.Label(main_frame, text="Task Durations (seconds)", font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(10, 5))
+        self._themed(tk.Label(main_frame, text="Task Durations (seconds)", font=CONFIG["fonts"]["header"]), 'label').pack(pady=(10, 5))
         
-        durations_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
+        durations_frame = self._themed(tk.Frame(main_frame), 'frame')
         durations_frame.pack(pady=10)
         
-        self.duration_entries = {} # Clear old entries
-        for i, (task_name, duration) in enumerate(self.settings["task_durations"].items()):
-            tk.Label(durations_frame, text=f"{task_name}:", font=CONFIG["fonts"]["small"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).grid(row=i, column=0, padx=10, pady=5, sticky='e')
+        self.duration_entries = {}
+        for i, task_name in enumerate(self.settings["task_durations"].keys()):
+            self._themed(tk.Label(durations_frame, text=f"{task_name}:", font=CONFIG["fonts"]["small"]), 'label').grid(row=i, column=0, padx=10, pady=5, sticky='e')
             entry = tk.Entry(durations_frame, font=CONFIG["fonts"]["small"], width=5, justify='center')
-            entry.insert(0, str(duration))
             entry.grid(row=i, column=1, padx=10, pady=5)
             self.duration_entries[task_name] = entry
 
+        # --- Theme Settings ---
+        self._themed(tk.Label(main_frame, text="Theme", font=CONFIG["fonts"]["header"]), 'label').pack(pady=(20, 5))
+        theme_menu = self._themed(tk.OptionMenu(main_frame, self.theme_var, *THEMES.keys()), 'button')
+        theme_menu.configure(font=CONFIG["fonts"]["small"], relief='flat', highlightthickness=0)
+        theme_menu.pack()
+
         # --- Debug Log Settings ---
-        tk.Label(main_frame, text="Logging", font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(20, 5))
+        self._themed(tk.Label(main_frame, text="Logging", font=CONFIG["fonts"]["header"]), 'label').pack(pady=(20, 5))
         
-        self.debug_log_var.set(self.settings['debug_logging_enabled'])
-        log_check = tk.Checkbutton(main_frame, text="Enable Detailed Debug Log (for full tests)", font=CONFIG["fonts"]["small"], bg=self.theme["app_bg"], fg=self.theme["label_fg"], variable=self.debug_log_var, selectcolor=self.theme["app_bg"])
+        log_check = self._themed(tk.Checkbutton(main_frame, text="Enable Detailed Debug Log (for full tests)", font=CONFIG["fonts"]["small"], variable=self.debug_log_var), 'check')
         log_check.pack()
 
+        # --- Practice Settings ---
+        self._themed(tk.Label(main_frame, text="Practice", font=CONFIG["fonts"]["header"]), 'label').pack(pady=(20, 5))
+        adaptive_check = self._themed(tk.Checkbutton(main_frame, text="Adaptive difficulty (practice mode)", font=CONFIG["fonts"]["small"], variable=self.adaptive_var), 'check')
+        adaptive_check.pack()
+
         # --- Action Buttons ---
-        buttons_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
+        buttons_frame = self._themed(tk.Frame(main_frame), 'frame')
         buttons_frame.pack(pady=40)
         
-        tk.Button(buttons_frame, text="Save and Back", font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=self._save_settings).pack(side='left', padx=10)
-        tk.Button(buttons_frame, text="Cancel", font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=self.create_welcome_screen).pack(side='left', padx=10)
+        self._themed(tk.Button(buttons_frame, text="Save and Back", font=CONFIG["fonts"]["button"], relief='flat', padx=20, pady=10, command=self._save_settings), 'button').pack(side='left', padx=10)
+        self._themed(tk.Button(buttons_frame, text="Cancel", font=CONFIG["fonts"]["button"], relief='flat', padx=20, pady=10, command=self.create_welcome_screen), 'button').pack(side='left', padx=10)
+        return screen
+
+    def _refresh_settings_screen(self):
+        """Resets the widgets to the saved settings so that a cancelled edit is discarded."""
+        for task_name, entry in self.duration_entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, str(self.settings["task_durations"][task_name]))
+        self.theme_var.set(self.settings['theme_name'])
+        self.debug_log_var.set(self.settings['debug_logging_enabled'])
+        self.adaptive_var.set(self.settings['adaptive_enabled'])
 
     def _save_settings(self):
         # Save task durations
@@ -151,34 +289,53 @@ class GiaApp(tk.Tk):
         
         # Save debug log setting
         self.settings['debug_logging_enabled'] = self.debug_log_var.get()
+        self.settings['adaptive_enabled'] = self.adaptive_var.get()
+
+        if self.theme_var.get() != self.settings['theme_name']:
+            self.apply_theme(self.theme_var.get())
         print("Settings saved.")
         self.create_welcome_screen()
 
     def _show_task_intro(self):
-        self._clear_frame()
-        main_frame = tk.Frame(self, bg=self.theme["app_bg"])
+        self._show_screen('intro')
+
+    def _build_intro_screen(self):
+        screen = self._themed(tk.Frame(self), 'frame')
+        main_frame = self._themed(tk.Frame(screen), 'frame')
         main_frame.pack(expand=True)
 
+        self._intro_title = self._themed(tk.Label(main_frame, font=CONFIG["fonts"]["title"]), 'label')
+        self._intro_title.pack(pady=(0, 20))
+        self._intro_duration = self._themed(tk.Label(main_frame, font=CONFIG["fonts"]["header"]), 'label')
+        self._intro_duration.pack(pady=10)
+
+        note = "Note: Performance in practice mode is not saved."
+        self._intro_note = self._themed(tk.Label(main_frame, text=note, font=CONFIG["fonts"]["italic"], fg="blue"), 'note')
+
+        self._intro_start = self._themed(tk.Button(main_frame, text="Start Task", font=CONFIG["fonts"]["button"], relief='flat', padx=20, pady=10, command=self.start_current_task), 'button')
+        self._intro_start.pack(pady=20)
+        return screen
+
+    def _refresh_intro_screen(self):
         duration = self.settings["task_durations"][self.current_task_name]
-        title_text = f"Practice: {self.current_task_name}" if self.is_practice_mode else f"Task: {self.current_task_name}"
-        
-        tk.Label(main_frame, text=title_text, font=CONFIG["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 20))
-        tk.Label(main_frame, text=f"You will have {duration} seconds.", font=CONFIG["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=10)
-        
-        if self.is_practice_mode:
-            note = "Note: Performance in practice mode is not saved."
-            tk.Label(main_frame, text=note, font=CONFIG["fonts"]["italic"], bg=self.theme["app_bg"], fg="blue").pack(pady=20)
+        mode = "Review" if self.is_review_mode else "Practice" if self.is_practice_mode else "Task"
+        title_text = f"{mode}: {self.current_task_name}"
+        self._intro_title.config(text=title_text)
+        self._intro_duration.config(text=f"You will have {duration} seconds.")
 
-        tk.Button(main_frame, text="Start Task", font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=self.start_current_task).pack(pady=20)
+        if self.is_practice_mode:
+            self._intro_note.pack(pady=20, before=self._intro_start)
+        else:
+            self._intro_note.pack_forget()
 
     # --- Question Display Methods ---
 
     def _display_question_ui(self, q):
         self.task_frame.configure(bg=self.theme["app_bg"])
-        if q['type'] == 'Reasoning': self._display_reasoning_step1(q)
-        elif q['type'] == 'Perceptual Speed': self._display_perceptual_speed(q)
-        elif q['type'] in ['Number Speed & Accuracy', 'Word Meaning']: self._display_number_or_word(q)
-        elif q['type'] == 'Spatial Visualisation': self._display_spatial(q)
+        if q.type == 'Reasoning': self._display_reasoning_step1(q)
+        elif q.type == 'Perceptual Speed': self._display_perceptual_speed(q)
+        elif q.type in ['Number Speed & Accuracy', 'Word Meaning']: self._display_number_or_word(q)
+        elif q.type == 'Spatial Visualisation': self._display_spatial(q)
 
     def _display_reasoning_step1(self, q):
         main_frame = tk.Frame(self.task_frame, bg=self.theme["app_bg"])
@@ -186,11 +343,11 @@ class GiaApp(tk.Tk):
 
         card_frame = tk.Frame(main_frame, bg=self.theme["card_bg"], padx=40, pady=20)
         card_frame.pack(pady=20)
-        tk.Label(card_frame, text=q['statement'], font=CONFIG["fonts"]["header"], bg=self.theme["card_bg"], fg=self.theme["label_fg"]).pack()
+        tk.Label(card_frame, text=q.statement, font=CONFIG["fonts"]["header"], bg=self.theme["card_bg"], fg=self.theme["label_fg"]).pack()
         
-        # Click anywhere to continue
-        tk.Label(main_frame, text="Click the screen when ready to continue", font=CONFIG["fonts"]["italic"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=30)
-        self._bind_all_for_next_step(self._display_reasoning_step2)
+        # Click anywhere (or press Space) to continue
+        tk.Label(main_frame, text="Click the screen or press Space when ready to continue", font=CONFIG["fonts"]["italic"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=30)
+        self.input.wait_for_continue(self._display_reasoning_step2)
 
     def _display_reasoning_step2(self):
         self._clear_frame(self.task_frame)
@@ -200,14 +357,17 @@ class GiaApp(tk.Tk):
         main_frame.pack(expand=True)
         
         ### FIX: Add the question label back in ###
-        tk.Label(main_frame, text=q['question'], font=CONFIG["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 40))
+        tk.Label(main_frame, text=q.question, font=CONFIG["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 40))
 
         options_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
         options_frame.pack(pady=20)
 
-        for option in q['options']:
-            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=12, height=2, command=lambda o=option: self._check_answer(o))
+        buttons = []
+        for option in q.options:
+            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=12, height=2)
             btn.pack(side='left', padx=15)
+            buttons.append(btn)
+        self._route_options(main_frame, q.options, buttons)
 
     def _display_perceptual_speed(self, q):
         main_frame = tk.Frame(self.task_frame, bg=self.theme["app_bg"])
@@ -218,16 +378,19 @@ class GiaApp(tk.Tk):
         char_frame.pack(pady=20)
         top_frame = tk.Frame(char_frame, bg=self.theme["app_bg"]); top_frame.pack()
         bot_frame = tk.Frame(char_frame, bg=self.theme["app_bg"]); bot_frame.pack()
-        for char_top, char_bot in zip([p[0] for p in q['pairs']], [p[1] for p in q['pairs']]):
+        for char_top, char_bot in zip([p[0] for p in q.pairs], [p[1] for p in q.pairs]):
             tk.Label(top_frame, text=char_top, font=CONFIG["fonts"]["mono_large"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(side='left', padx=10)
             tk.Label(bot_frame, text=char_bot, font=CONFIG["fonts"]["mono_large"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(side='left', padx=10)
 
         # Options display
         options_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
         options_frame.pack(pady=30)
-        for option in q['options']:
-            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=4, height=2, command=lambda o=option: self._check_answer(o))
+        buttons = []
+        for option in q.options:
+            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=4, height=2)
             btn.pack(side='left', padx=10)
+            buttons.append(btn)
+        self._route_options(main_frame, q.options, buttons)
 
     def _display_number_or_word(self, q):
         main_frame = tk.Frame(self.task_frame, bg=self.theme["app_bg"])
@@ -237,13 +400,16 @@ class GiaApp(tk.Tk):
         options_frame.pack(pady=20)
         
         button_font = tkFont.Font(font=CONFIG["fonts"]["button"])
-        max_pixel_width = max(button_font.measure(str(o)) for o in q['options'])
+        max_pixel_width = max(button_font.measure(str(o)) for o in q.options)
         wrap_length = min(max_pixel_width + 40, 500)
 
-        for option in q['options']:
-            btn = tk.Button(options_frame, text=str(option), wraplength=wrap_length, font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=lambda o=option: self._check_answer(o))
+        buttons = []
+        for option in q.options:
+            btn = tk.Button(options_frame, text=str(option), wraplength=wrap_length, font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', padx=20, pady=10)
             btn.pack(side='left', padx=15)
-            
+            buttons.append(btn)
+        self._route_options(main_frame, q.options, buttons)
+
     def _display_spatial(self, q):
         main_frame = tk.Frame(self.task_frame, bg=self.theme["app_bg"])
         main_frame.pack(expand=True)
@@ -252,13 +418,13 @@ class GiaApp(tk.Tk):
         pairs_frame.pack(pady=20)
 
         self.spatial_images = []
-        for i, pair_data in enumerate(q['pairs']):
+        for i, pair_data in enumerate(q.pairs):
             card = tk.Frame(pairs_frame, bg=self.theme["card_bg"], width=120, height=260)
             card.grid(row=0, column=i, padx=15)
             card.pack_propagate(False) # Prevent card from shrinking to fit content
 
-            top_img = self._make_spatial_image(pair_data['letter'], pair_data['top_is_mirror'], pair_data['top_rot'])
-            bot_img = self._make_spatial_image(pair_data['letter'], pair_data['bottom_is_mirror'], pair_data['bottom_rot'])
+            top_img = self._make_spatial_image(pair_data.letter, pair_data.top_is_mirror, pair_data.top_rot)
+            bot_img = self._make_spatial_image(pair_data.letter, pair_data.bottom_is_mirror, pair_data.bottom_rot)
             self.spatial_images.extend([top_img, bot_img])
             
             tk.Label(card, image=top_img, bg=self.theme["card_bg"]).pack(pady=(20, 10))
@@ -267,15 +433,32 @@ class GiaApp(tk.Tk):
         options_frame = tk.Frame(main_frame, bg=self.theme["app_bg"])
         options_frame.pack(pady=30)
         # Options are 0, 1, 2 since there are only 2 pairs
-        for option in range(3):
-            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=4, height=2, command=lambda o=option: self._check_answer(o))
+        buttons = []
+        for option in q.options:
+            btn = tk.Button(options_frame, text=str(option), font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], activebackground=self.theme["button_active_bg"], activeforeground=self.theme["button_fg"], relief='flat', width=4, height=2)
             btn.pack(side='left', padx=10)
+            buttons.append(btn)
+        self._route_options(main_frame, q.options, buttons)
+
+    def _route_options(self, parent, options, buttons):
+        """Hands a question's option buttons to the input dispatcher and shows the keyboard hint."""
+        self.input.show_options(options, buttons, self._check_answer)
+        hint = "Keys: the number shown, or ←/→ then Space" if digits_by_value(options) else f"Keys: 1–{len(options)}, or ←/→ then Space"
+        tk.Label(parent, text=hint, font=CONFIG["fonts"]["italic"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(0, 10))
+
+    def _highlight_option(self, button, on):
+        button.configure(bg=self.theme["button_active_bg"] if on else self.theme["button_bg"],
+                         relief='solid' if on else 'flat')
     
     # --- Helper and Logic Methods ---
 
     def _go_back_to_menu(self):
         """Cancels the current task and returns to the welcome screen without saving."""
         self._cancel_timers()
+        self.input.clear()
+        self.review.save()
+        if not self.is_practice_mode:
+            self.journal.finish('abandoned')
         self.create_welcome_screen()
 
     def _make_spatial_image(self, char, is_mirrored, angle, size=80):
@@ -288,19 +471,8 @@ class GiaApp(tk.Tk):
         rotated_img = img.rotate(angle, expand=True, resample=Image.BICUBIC)
         return ImageTk.PhotoImage(rotated_img)
 
-    def _bind_all_for_next_step(self, callback):
-        """Binds the next click to a callback, using self.after to avoid capturing the current event."""
-        def on_click(event):
-            # This function will run on the *next* user click.
-            self.unbind_all("<Button-1>")
-            callback()
-
-        # Use self.after to delay the binding. This pushes the action to the end
-        # of the current event loop cycle, ensuring the click that triggered this
-        # screen is not immediately captured. A 10ms delay is more than enough.
-        self.after(10, lambda: self.bind_all("<Button-1>", on_click))
-        
-    def start_current_task(self):
+    def start_current_task(self, resume=None):
+        """Starts the current task, or with ``resume`` (from the session journal) continues it after the last answer."""
         self._clear_frame()
         self.task_frame = tk.Frame(self, bg=self.theme["app_bg"])
         self.task_frame.pack(expand=True, fill='both')
@@ -309,11 +481,15 @@ class GiaApp(tk.Tk):
 
         # Calculate question bank size for this task ---
         duration_seconds = self.settings["task_durations"][self.current_task_name]
-        duration_minutes = duration_seconds / 60.0
-        qpm = self.settings["questions_per_minute"]
-        
-        self.question_bank_size = max(1, round(duration_minutes * qpm))
-        self.questions_answered_in_task = 0
+        self.question_bank_size = question_bank_size(duration_seconds, self.settings["questions_per_minute"])
+        answers = resume['answers'] if resume else []
+        self.questions_answered_in_task = len(answers)
+        self.factory.begin_task(self.current_task_name)
+        # Regenerate the questions already answered so the stream continues where it stopped.
+        for _ in answers:
+            self.factory.generate(self.current_task_name)
+        if resume is None and not self.is_practice_mode:
+            self.journal.begin_task(self.current_task_name)
 
         back_button = tk.Button(
                 self,
@@ -331,8 +507,13 @@ class GiaApp(tk.Tk):
         # Place it in the top-left corner
         back_button.place(relx=0.0, rely=0.0, x=15, y=15, anchor='nw')
 
-        self.current_task_results = []
+        self.task_tally = TaskTally.from_answers(answers)
         self.time_left = self.settings["task_durations"][self.current_task_name]
+        if answers and resume['time_left'] is not None:
+            self.time_left = resume['time_left']
+            if self.time_left <= 0 or len(answers) >= self.question_bank_size:
+                self.end_task()
+                return
         self.timer_label = tk.Label(self, text=f"Time: {self.time_left}", font=CONFIG["fonts"]["timer"], bg=self.theme["app_bg"], fg=self.theme["label_fg"])
         self.timer_label.place(relx=1.0, rely=1.0, x=-10, y=-10, anchor='se')
         self._update_timer()
@@ -368,6 +549,12 @@ class GiaApp(tk.Tk):
             tk.Label(main_frame, text=score_text, font=self.settings["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=(15, 5))
             tk.Label(main_frame, text=percentage_text, font=self.settings["fonts"]["header"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=5)
 
+        # Rank among all logged attempts for this task, from the history index
+        rank, total = stats.get('ranks', {}).get('adjusted_score', (0, 0))
+        if total > 1:
+            rank_text = f"Rank {rank} of {total} logged attempts (top {rank / total * 100:.0f}% for {task_name})"
+            tk.Label(main_frame, text=rank_text, font=self.settings["fonts"]["small"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=5)
+
         # Plotting logic
         summary_df = self.data_manager.load_summary_data()
         history_df = summary_df[summary_df['task_name'] == task_name]
@@ -395,6 +582,50 @@ class GiaApp(tk.Tk):
         button_text, command = ("Back to Home", self.create_welcome_screen) if self.is_practice_mode else ("Continue", self.next_task)
         tk.Button(main_frame, text=button_text, font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=command).pack(pady=20)
 
+    def _show_progress_screen(self):
+        """Plots each task's daily (or, for long histories, weekly) averages from the rollups."""
+        self._clear_frame()
+        main_frame = tk.Frame(self, bg=self.theme["app_bg"])
+        main_frame.pack(expand=True, fill='both', padx=20, pady=20)
+
+        tk.Label(main_frame, text="Progress Over Time", font=self.settings["fonts"]["title"], bg=self.theme["app_bg"], fg=self.theme["label_fg"]).pack(pady=10)
+
+        rollups = self.data_manager.rollups
+        rollups.refresh()  # Picks up attempts other instances have logged since start-up.
+        max_points = self.settings["progress_max_points"]
+        titles = {'accuracy': 'Accuracy (%)', 'seconds_per_question': 'Seconds per Question', 'adjusted_score': 'Adjusted Score'}
+
+        fig, axes = plt.subplots(len(METRICS), 1, figsize=(8, 7), sharex=True)
+        fig.patch.set_facecolor(self.theme["app_bg"])
+        for task_name in rollups.tasks():
+            starts, means = rollups.series(task_name, 'daily')
+            if len(starts) > max_points:
+                starts, means = rollups.series(task_name, 'weekly')
+            days = [date.fromisoformat(s) for s in starts]
+            xs = [d.toordinal() for d in days]
+            for ax, metric in zip(axes, METRICS):
+                ys = means[metric]
+                kept = downsample_lttb(xs, ys, max_points)
+                ax.plot([days[i] for i in kept], [ys[i] for i in kept], marker='.', linewidth=1, label=task_name)
+
+        for ax, metric in zip(axes, METRICS):
+            ax.set_facecolor(self.theme["card_bg"])
+            ax.set_ylabel(titles[metric], color=self.theme["label_fg"])
+            ax.grid(True, alpha=0.2)
+            ax.tick_params(colors=self.theme["label_fg"])
+        if rollups.tasks():
+            axes[0].legend(fontsize='small')
+        else:
+            axes[0].set_title('No logged attempts yet', color=self.theme["label_fg"])
+        fig.autofmt_xdate()
+        fig.tight_layout(pad=2.0)
+
+        canvas = FigureCanvasTkAgg(fig, master=main_frame)
+        canvas.get_tk_widget().pack(side='top', fill='both', expand=True, pady=10)
+        plt.close(fig)
+
+        tk.Button(main_frame, text="Back to Home", font=CONFIG["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], relief='flat', padx=20, pady=10, command=self.create_welcome_screen).pack(pady=20)
+
     def _show_final_results(self):
         self._clear_frame()
         # Main content area that will be scrollable
@@ -424,19 +655,68 @@ class GiaApp(tk.Tk):
         tk.Button(self, text="Practice Again", font=self.settings["fonts"]["button"], bg=self.theme["button_bg"], fg=self.theme["button_fg"], relief='flat', command=self.create_welcome_screen).pack(pady=20, ipady=5)
     
     def start_series(self):
-        self.is_practice_mode = False
+        self.is_practice_mode = self.is_review_mode = False
         self.task_order = list(self.settings["task_durations"].keys())
         self.current_task_index = -1
         self.series_results = [] # This stores summary dicts per task
+        self.factory.new_session()
+        self.journal.begin_series(self.factory.seed, self.task_order, self.settings["task_durations"],
+                                  self.settings["wrong_penalty"], self.settings['debug_logging_enabled'])
         self.next_task()
 
-    def start_practice_session(self, task_name):
-        self.is_practice_mode = True; self.current_task_name = task_name; self.current_task_index = -1; self.series_results = []; self._show_task_intro()
+    def start_practice_session(self, task_name, review=False):
+        """Practice of one task; with ``review=True`` the missed questions that are due come first."""
+        self.is_practice_mode = True; self.is_review_mode = review; self.current_task_name = task_name; self.current_task_index = -1; self.series_results = []; self.factory.new_session(); self._show_task_intro()
 
     def next_task(self):
         self.current_task_index += 1
         if self.current_task_index < len(self.task_order): self.current_task_name = self.task_order[self.current_task_index]; self._show_task_intro()
-        else: self._show_final_results()
+        else: self.journal.finish(); self._show_final_results()
+
+    def _offer_resume(self):
+        """Offers to continue a series that the session journal shows was interrupted."""
+        state = self.journal.recover()
+        if state is None:
+            return
+        series, completed, current = state['series'], state['completed'], state['current']
+        self._log_missing_summaries(series, completed)
+        if len(completed) >= len(series['task_order']):
+            self.journal.finish()
+            return
+
+        task_name = current['task'] if current else series['task_order'][len(completed)]
+        message = (f"A test series started at {series['started']} was interrupted "
+                   f"({len(completed)} of {len(series['task_order'])} tasks done, next: {task_name}).\n\nResume it?")
+        if not messagebox.askyesno("Resume Test Series", message, parent=self):
+            self.journal.finish('abandoned')
+            return
+
+        self.is_practice_mode = False
+        self.task_order = series['task_order']
+        self.settings["task_durations"].update(series['task_durations'])
+        self.settings["wrong_penalty"].update(series['wrong_penalty'])
+        self.settings['debug_logging_enabled'] = series['debug_logging_enabled']
+        self.series_results = completed
+        self.factory.new_session(series['seed'])
+        self.journal.reopen()
+        if current:
+            self.current_task_index = len(completed)
+            self.current_task_name = task_name
+            self.start_current_task(resume=current)
+        else:
+            self.current_task_index = len(completed) - 1
+            self.next_task()
+
+    def _log_missing_summaries(self, series, completed):
+        """Logs journaled task summaries that a crash kept out of the summary log."""
+        seed = str(series['seed'])
+        logged = {row['task_name'] for row in log_shards.iter_rows_since(self.data_manager.summary_log, series['started'])
+                  if row.get('session_seed') == seed}
+        for summary in completed:
+            if summary['task_name'] not in logged:
+                self.data_manager.log_summary_stats(summary['task_name'], summary['question_bank_size'], summary['answered_correct'],
+                                                    summary['time_elapsed'], series['wrong_penalty'][summary['task_name']], session_seed=series['seed'])
+                self._stats_dirty = True
 
     def end_task(self):
         if hasattr(self, 'task_is_ending') and self.task_is_ending:
@@ -444,44 +724,31 @@ class GiaApp(tk.Tk):
         self.task_is_ending = True
         
         self._cancel_timers()
+        self.input.clear()
+        self.adaptive.save()
+        self.review.save()
 
         # --- UNIFIED SCORING LOGIC ---
-        stats = {}
-        bank_size = self.question_bank_size
-        answered_correct = sum(r['correct'] for r in self.current_task_results)
-        total_answered = len(self.current_task_results)
-        answered_wrong = total_answered - answered_correct
-        not_answered = bank_size - total_answered
-        
+        answered_correct = self.task_tally.correct
+        total_answered = self.task_tally.answered
         max_time = self.settings["task_durations"][self.current_task_name]
-        time_elapsed = max_time - max(0, self.time_left)
-
-        stats['question_bank_size'] = bank_size
-        stats['total_answered'] = total_answered
-        stats['answered_correct'] = answered_correct
-        stats['answered_wrong'] = answered_wrong
-        stats['not_answered'] = not_answered
-        stats['max_time'] = max_time
-        stats['time_elapsed'] = time_elapsed
-        stats['accuracy'] = (answered_correct / total_answered * 100) if total_answered > 0 else 0
-        stats['spq'] = (time_elapsed / total_answered) if total_answered > 0 else 0
+        penalty = None if self.is_practice_mode else self.settings["wrong_penalty"][self.current_task_name]
+        stats = score_task(answered_correct, total_answered, self.question_bank_size, max_time, self.time_left, penalty)
 
-        if self.is_practice_mode:
-            stats['adjusted_score'] = 'N/A'
-            stats['score_percentage'] = 'N/A'
-        else:
-            penalty = self.settings["wrong_penalty"][self.current_task_name]
-            # Adjusted score penalizes wrong AND unanswered questions
-            stats['adjusted_score'] = answered_correct + (answered_wrong + not_answered) * penalty
-            stats['score_percentage'] = (max(0, stats['adjusted_score']) / bank_size * 100) if bank_size > 0 else 0
-            
-            # Log to CSV
-            self.data_manager.log_summary_stats(self.current_task_name, bank_size, answered_correct, time_elapsed, penalty)
-            
-            # Store this complete summary for the final report screen
+        if not self.is_practice_mode:
+            # Store this complete summary for the final report screen, journaling it before it is logged
             task_summary = stats.copy()
             task_summary['task_name'] = self.current_task_name
             self.series_results.append(task_summary)
+            self.journal.end_task(task_summary)
+
+            # Log to CSV
+            logged = self.data_manager.log_summary_stats(self.current_task_name, self.question_bank_size, answered_correct,
+                                                         stats['time_elapsed'], penalty, session_seed=self.factory.seed)
+            if logged:
+                stats['ranks'] = logged['ranks']
+            self._stats_dirty = True
+            if self.syncer: self.syncer.trigger()
 
         if total_answered > 0 or not self.is_practice_mode:
             self._show_task_summary_screen(self.current_task_name, stats)
@@ -491,17 +758,27 @@ class GiaApp(tk.Tk):
 
     def show_next_question(self):
         self._clear_frame(self.task_frame)
-        gens = {'Reasoning': self.factory.generate_reasoning, 'Perceptual Speed': self.factory.generate_perceptual_speed, 'Number Speed & Accuracy': self.factory.generate_number_speed, 'Word Meaning': self.factory.generate_word_meaning, 'Spatial Visualisation': self.factory.generate_spatial_visualisation}
-        self.current_question = gens[self.current_task_name](); self._display_question_ui(self.current_question); self.question_start_time = time.time()
+        # A review session asks the items that are due, then carries on as normal practice.
+        review_item = self.review.pop_due(self.current_task_name, self.factory.rng) if self.is_review_mode else None
+        if review_item is not None:
+            self.current_question = review_item
+        elif self.is_practice_mode and self.settings['adaptive_enabled']:
+            self.current_question = self.adaptive.next_question(self.current_task_name)
+        else:
+            self.current_question = self.factory.generate(self.current_task_name)
+        self._display_question_ui(self.current_question); self.question_start_time = time.perf_counter()
 
-    def _check_answer(self, selected_answer):
+    def _check_answer(self, selected_answer, answered_at=None):
         """
         Processes the user's answer, logs it, and decides whether to
-        show the next question or end the task.
+        show the next question or end the task. ``answered_at`` is the
+        ``time.perf_counter()`` time of the input event that gave the answer.
         """
         # 1. Calculate the result of this single question
-        time_taken_ms = (time.time() - self.question_start_time) * 1000
-        is_correct = (selected_answer == self.current_question['answer'])
+        if answered_at is None:
+            answered_at = time.perf_counter()
+        time_taken_ms = (answered_at - self.question_start_time) * 1000
+        is_correct = (selected_answer == self.current_question.answer)
 
         # 2. Handle detailed debug logging if enabled
         if self.settings['debug_logging_enabled'] and not self.is_practice_mode:
@@ -509,14 +786,20 @@ class GiaApp(tk.Tk):
                 task_name=self.current_task_name,
                 question_data=self.current_question,
                 selected_answer=selected_answer,
-                correct_answer=self.current_question['answer'],
+                correct_answer=self.current_question.answer,
                 time_ms=time_taken_ms,
-                is_correct=is_correct
+                is_correct=is_correct,
+                session_seed=self.factory.seed,
+                question_index=self.questions_answered_in_task
             )
         
-        # 3. Store the simple result (correct/incorrect) for the current task's stats.
-        # This list is used by end_task() to calculate the summary.
-        self.current_task_results.append({'correct': is_correct})
+        # 3. Count the result (correct/incorrect) towards the current task's stats.
+        # end_task() reads the totals straight from the tally.
+        self.task_tally.record(is_correct)
+        self.adaptive.record(self.current_question, is_correct)
+        self.review.record(self.current_question, is_correct)
+        if not self.is_practice_mode:
+            self.journal.answer(is_correct, self.time_left)
 
         # 4. Increment the count of questions answered in this task.
         self.questions_answered_in_task += 1
@@ -536,7 +819,9 @@ class GiaApp(tk.Tk):
         if self._update_timer_id: self.after_cancel(self._update_timer_id); self._update_timer_id = None
 
     def _on_closing(self):
-        self._cancel_timers(); self.quit(); self.destroy()
+        self._cancel_timers(); self.journal.close(); self.review.save(); self.data_manager.compact()
+        if self.syncer: self.syncer.stop()
+        self.quit(); self.destroy()
 
 
 
@@ -1,268 +1,139 @@
 import random
 
-class QuestionFactory:
-    """Generates questions for the different GIA task types."""
-
-    def __init__(self):
-        self._names = [
-            'Alex', 'Anna', 'Ben', 'Chloe', 'David', 'Emily', 'Ethan', 'Eva', 
-            'Frank', 'Grace', 'Harry', 'Henry', 'Isla', 'Jack', 'James', 'Leo', 
-            'Liam', 'Lily', 'Lucy', 'Max', 'Maya', 'Mia', 'Noah', 'Nora', 
-            'Oliver', 'Olivia', 'Ruby', 'Sam', 'Sophia', 'Tom', 'Zoe'
-        ]
+from lexicon import IndexDeck, open_lexicon
+from records import (NumberSpeedQuestion, PerceptualSpeedQuestion, ReasoningQuestion, SpatialPair,
+                     SpatialQuestion, WordMeaningQuestion)
 
-        self._adjective_pairs = [
-            # Original Pairs
-            ('heavier', 'lighter'), ('stronger', 'weaker'), ('faster', 'slower'),
-            ('taller', 'shorter'), ('brighter', 'duller'), ('happier', 'sadder'),
-            ('older', 'younger'), ('richer', 'poorer'), ('simpler', 'more complex'),
-            ('calmer', 'more anxious'), ('rarer', 'more common'), ('warmer', 'colder'),
-            ('wiser', 'more foolish'), ('braver', 'more timid'), ('louder', 'quieter'),
-            ('sharper', 'blunter'), ('smoother', 'rougher'), ('neater', 'messier'),
-            ('cheaper', 'more expensive'), ('darker', 'lighter'), ('earlier', 'later'),
-            
-            # New Pairs
-            ('wider', 'narrower'), ('deeper', 'shallower'), ('thicker', 'thinner'),
-            ('kinder', 'meaner'), ('busier', 'freer'), ('luckier', 'unluckier'),
-            ('more patient', 'less patient'), ('more careful', 'more careless'),
-            ('more generous', 'stingier'), ('more skilled', 'less skilled'),
-            ('more polite', 'ruder'), ('more flexible', 'stiffer'),
-            ('more honest', 'more dishonest'), ('more talkative', 'more reserved'),
-            ('more optimistic', 'more pessimistic')
-        ]
-        
-        self._comparative_to_base = {
-            # Original Mappings
-            'heavier': 'heavy', 'lighter': 'light', 'stronger': 'strong', 'weaker': 'weak',
-            'faster': 'fast', 'slower': 'slow', 'taller': 'tall', 'shorter': 'short',
-            'brighter': 'bright', 'duller': 'dull', 'happier': 'happy', 'sadder': 'sad',
-            'older': 'old', 'younger': 'young', 'richer': 'rich', 'poorer': 'poor',
-            'simpler': 'simple', 'more complex': 'complex', 'calmer': 'calm',
-            'more anxious': 'anxious', 'rarer': 'rare', 'more common': 'common',
-            'warmer': 'warm', 'colder': 'cold', 'wiser': 'wise', 'more foolish': 'foolish',
-            'braver': 'brave', 'more timid': 'timid', 'louder': 'loud', 'quieter': 'quiet',
-            'sharper': 'sharp', 'blunter': 'blunt', 'smoother': 'smooth', 'rougher': 'rough',
-            'neater': 'neat', 'messier': 'messy', 'cheaper': 'cheap',
-            'more expensive': 'expensive', 'darker': 'dark', 'earlier': 'early', 'later': 'late',
-            
-            # New Mappings (must correspond to the new pairs above)
-            'wider': 'wide', 'narrower': 'narrow',
-            'deeper': 'deep', 'shallower': 'shallow',
-            'thicker': 'thick', 'thinner': 'thin',
-            'kinder': 'kind', 'meaner': 'mean',
-            'busier': 'busy', 'freer': 'free',
-            'luckier': 'lucky', 'unluckier': 'unlucky',
-            'more patient': 'patient', 'less patient': 'patient',
-            'more careful': 'careful', 'more careless': 'careless',
-            'more generous': 'generous', 'stingier': 'stingy',
-            'more skilled': 'skilled', 'less skilled': 'skilled',
-            'more polite': 'polite', 'ruder': 'rude',
-            'more flexible': 'flexible', 'stiffer': 'stiff',
-            'more honest': 'honest', 'more dishonest': 'dishonest',
-            'more talkative': 'talkative', 'more reserved': 'reserved',
-            'more optimistic': 'optimistic', 'more pessimistic': 'pessimistic'
+class QuestionFactory:
+    """Generates questions for the different GIA task types.
+
+    All randomness comes from a private ``random.Random`` stream. Each session has
+    a seed, and each task within it gets its own stream derived from that seed, so
+    any task can be regenerated exactly from ``(seed, task_name)``.
+    """
+
+    def __init__(self, seed=None):
+        # Lexicons are memory-mapped from src/lexicons, so they cost nothing until used.
+        self._names = open_lexicon('names.tsv')
+        self._adjective_pairs = open_lexicon('adjective_pairs.tsv')  # (comparative, opposite, base of the first)
+        self._word_groups = open_lexicon('word_groups.tsv')  # (word, synonym or antonym, odd one out)
+        self._generators = {
+            'Reasoning': self.generate_reasoning,
+            'Perceptual Speed': self.generate_perceptual_speed,
+            'Number Speed & Accuracy': self.generate_number_speed,
+            'Word Meaning': self.generate_word_meaning,
+            'Spatial Visualisation': self.generate_spatial_visualisation,
         }
-        self._word_groups = [
-            # --- Original Synonyms ---
-            ('halt', 'stop', 'cold'), 
-            ('fast', 'quick', 'chair'), 
-            ('happy', 'joyful', 'river'),
-            ('large', 'big', 'car'), 
-            ('sofa', 'couch', 'apple'), 
-            ('begin', 'start', 'end'),
-            ('silent', 'quiet', 'loud'), 
-            ('difficult', 'hard', 'easy'), 
-            ('correct', 'right', 'wrong'),
-            ('rich', 'wealthy', 'poor'), 
-            ('unhappy', 'sad', 'glad'), 
-            ('beautiful', 'pretty', 'ugly'),
-            ('smart', 'intelligent', 'stupid'), 
-            ('speak', 'talk', 'listen'),
-            ('finish', 'complete', 'begin'), 
-            ('idea', 'thought', 'action'),
-            ('strange', 'unusual', 'normal'), 
-            ('powerful', 'strong', 'weak'),
-            ('annual', 'yearly', 'daily'), 
-            ('choose', 'select', 'reject'),
-            ('ancient', 'old', 'new'),
-
-            # --- New Synonyms ---
-            ('tiny', 'small', 'ocean'),
-            ('angry', 'furious', 'book'),
-            ('create', 'make', 'sky'),
-            ('help', 'assist', 'tree'),
-            ('job', 'work', 'cloud'),
-            ('ask', 'inquire', 'shoe'),
-            ('get', 'receive', 'give'),
-            ('tell', 'inform', 'secret'),
-            ('brave', 'courageous', 'table'),
-            ('calm', 'peaceful', 'storm'),
-            ('eager', 'keen', 'apathy'),
-            ('true', 'correct', 'false'),
-            ('story', 'tale', 'math'),
-            ('error', 'mistake', 'truth'),
-            ('gift', 'present', 'invoice'),
-            ('ally', 'partner', 'foe'),
-
-            # --- Tricky Synonyms ---
-            ('obtain', 'acquire', 'lose'),
-            ('lucid', 'clear', 'blanket'),
-            ('pensive', 'thoughtful', 'hammer'),
-            ('prudent', 'cautious', 'pillow'),
-            ('garrulous', 'loquacious', 'fork'),
-            ('adequate', 'sufficient', 'lacking'),
-            ('ephemeral', 'transient', 'spoon'),
-            ('taciturn', 'reserved', 'bottle'),
-            ('meticulous', 'thorough', 'lamp'),
-            ('ubiquitous', 'omnipresent', 'coin'),
-            ('trivial', 'minor', 'major'),
-            ('vital', 'essential', 'optional'),
-            ('flexible', 'adaptable', 'rigid'),
-
-            # --- Original Antonyms ---
-            ('up', 'down', 'table'), 
-            ('hot', 'cold', 'window'), 
-            ('begin', 'end', 'apple'),
-            ('good', 'bad', 'river'), 
-            ('always', 'never', 'banana'), 
-            ('accept', 'reject', 'carpet'),
-            ('above', 'below', 'pencil'), 
-            ('victory', 'defeat', 'bottle'),
-            ('success', 'failure', 'candle'), 
-            ('love', 'hate', 'truck'),
-            ('buy', 'sell', 'mountain'), 
-            ('push', 'pull', 'window'), 
-            ('light', 'dark', 'cookie'),
-            ('laugh', 'cry', 'forest'), 
-            ('remember', 'forget', 'guitar'),
-            ('friend', 'enemy', 'cloud'), 
-            ('question', 'answer', 'bridge'),
-            ('sunrise', 'sunset', 'elephant'),
+        self.new_session(seed)
 
-            # --- New Antonyms ---
-            ('arrive', 'depart', 'bread'),
-            ('build', 'destroy', 'flower'),
-            ('empty', 'full', 'paper'),
-            ('wet', 'dry', 'stone'),
-            ('enter', 'exit', 'music'),
-            ('simple', 'complex', 'water'),
-            ('lead', 'follow', 'path'),
-            ('public', 'private', 'square'),
-            ('find', 'lose', 'search'),
-            ('wide', 'narrow', 'road'),
-            ('smooth', 'rough', 'silk'),
-            ('day', 'night', 'noon'),
-            ('interior', 'exterior', 'wall'),
-            ('major', 'minor', 'scale'),
-            ('include', 'exclude', 'group'),
+    def new_session(self, seed=None):
+        """Starts a new session with the given seed, or a fresh random one."""
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.begin_task(None)
+        return self.seed
 
-            # --- Tricky Antonyms ---
-            ('expand', 'contract', 'phone'),
-            ('permit', 'forbid', 'ring'),
-            ('praise', 'criticize', 'key'),
-            ('reveal', 'conceal', 'boat'),
-            ('harmony', 'dissonance', 'mirror'),
-            ('frugal', 'extravagant', 'ship'),
-            ('optimist', 'pessimist', 'glove'),
-            ('ascend', 'descend', 'train'),
-            ('innocent', 'guilty', 'judge'),
-            ('bravery', 'cowardice', 'medal'),
-            ('chaos', 'order', 'mess'),
-            ('permanent', 'temporary', 'job'),
-            ('compulsory', 'voluntary', 'task')
-        ]
-
-        # Create a shuffled deck of word groups for the session.
-        self._available_word_groups = self._word_groups.copy()
-        random.shuffle(self._available_word_groups)
+    def begin_task(self, task_name):
+        """Switches to the deterministic stream for ``task_name`` within the current session."""
+        self.rng = random.Random(f"{self.seed}:{task_name}")
+        # A lazily shuffled deck of word group indices for the task.
+        self._word_deck = IndexDeck(len(self._word_groups), self.rng)
 
     def _reset_word_groups(self):
         """Resets and reshuffles the pool of available word meaning questions."""
         print("Word Meaning question pool exhausted. Resetting and reshuffling.")
-        self._available_word_groups = self._word_groups.copy()
-        random.shuffle(self._available_word_groups)
+        self._word_deck.reset()
+
+    def generate(self, task_name):
+        """Generates the next question for ``task_name``."""
+        return self._generators[task_name]()
+
+    @property
+    def word_groups(self):
+        return self._word_groups
+
+    @property
+    def generators(self):
+        return self._generators
 
-    def generate_reasoning(self):
-        p1, p2 = random.sample(self._names, 2)
-        adj1, adj2 = random.choice(self._adjective_pairs)
-        if random.random() > 0.5:
+    def generate_reasoning(self, negated=None):
+        """``negated`` forces the "not as ... as" form (True) or the plain form (False)."""
+        (p1,), (p2,) = self.rng.sample(self._names, 2)
+        adj1, adj2, base = self.rng.choice(self._adjective_pairs)
+        if (self.rng.random() > 0.5) if negated is None else not negated:
             statement, answers = f"{p1} is {adj1} than {p2}.", {adj1: p1, adj2: p2}
         else:
-            base = self._comparative_to_base.get(adj1, adj1)
             statement, answers = f"{p1} is not as {base} as {p2}.", {adj1: p2, adj2: p1}
-        question_adj = random.choice([adj1, adj2])
-        return {"type": "Reasoning", "statement": statement, "question": f"Who is {question_adj}?", "options": [p1, p2], "answer": answers[question_adj]}
+        question_adj = self.rng.choice([adj1, adj2])
+        return ReasoningQuestion(statement, f"Who is {question_adj}?", (p1, p2), answers[question_adj])
 
-    def generate_perceptual_speed(self):
+    def generate_perceptual_speed(self, matches=None):
+        """``matches`` forces the number of matching pairs (0-4) instead of drawing each pair at random."""
         alphabet, pairs, match_count = 'abcdefghjkmnpqrstuvwxyz', [], 0
-        top_upper = random.choice([True, False])
+        top_upper = self.rng.choice([True, False])
         top_fn, bot_fn = (str.upper, str.lower) if top_upper else (str.lower, str.upper)
-        for _ in range(4):
-            if random.random() < 0.6:
-                char = random.choice(alphabet); pairs.append((top_fn(char), bot_fn(char))); match_count += 1
+        matching = None if matches is None else set(self.rng.sample(range(4), matches))
+        for i in range(4):
+            if (self.rng.random() < 0.6) if matching is None else i in matching:
+                char = self.rng.choice(alphabet); pairs.append((top_fn(char), bot_fn(char))); match_count += 1
             else:
-                a, b = random.sample(alphabet, 2); pairs.append((top_fn(a), bot_fn(b)))
-        return {"type": "Perceptual Speed", "pairs": pairs, "options": list(range(5)), "answer": match_count}
-
-    def generate_number_speed(self):
-        mid = random.randint(10, 50); d1, d2 = random.randint(2, 15), random.randint(2, 15)
-        while d1 == d2: d2 = random.randint(2, 15)
+                a, b = self.rng.sample(alphabet, 2); pairs.append((top_fn(a), bot_fn(b)))
+        return PerceptualSpeedQuestion(tuple(pairs), match_count)
+
+    def generate_number_speed(self, gap=None):
+        """``gap`` forces the difference between the two distances from the middle number (1-13)."""
+        mid = self.rng.randint(10, 50)
+        if gap is None:
+            d1, d2 = self.rng.randint(2, 15), self.rng.randint(2, 15)
+            while d1 == d2: d2 = self.rng.randint(2, 15)
+        else:
+            near = self.rng.randint(2, 15 - gap)
+            d1, d2 = (near, near + gap) if self.rng.random() < 0.5 else (near + gap, near)
         low, high = mid - d1, mid + d2; answer = high if d2 > d1 else low
-        nums = [low, mid, high]; random.shuffle(nums)
-        return {"type": "Number Speed & Accuracy", "options": nums, "answer": answer}
+        nums = [low, mid, high]; self.rng.shuffle(nums)
+        return NumberSpeedQuestion(tuple(nums), answer)
 
     def generate_word_meaning(self):
         # If the deck of available questions is empty, reset it.
-        if not self._available_word_groups:
+        if not self._word_deck:
             self._reset_word_groups()
 
-        # Pop a question from the end of the shuffled list.
-        group = self._available_word_groups.pop()
-        
+        # Deal the next group index from the shuffled deck.
+        return self.word_meaning_from_group(self._word_deck.deal())
+
+    def word_meaning_from_group(self, item):
+        """Builds a Word Meaning question from the word group at index ``item`` of the lexicon."""
+        group = self._word_groups[item]
         options = list(group)
-        random.shuffle(options)
-        return {
-            "type": "Word Meaning",
-            "options": options,
-            "answer": group[2] # The odd one out is always the 3rd item
-        }
+        self.rng.shuffle(options)
+        return WordMeaningQuestion(item, tuple(options), group[2])  # The odd one out is always the 3rd item
 
-    def generate_spatial_visualisation(self):
+    def generate_spatial_visualisation(self, matches=None):
         """
         Generates a spatial visualisation task with two pairs, both using the same letter.
+        ``matches`` forces the number of rotatable matches (0-2).
         """
         base_letters = ['R', 'F', 'P']
         rotations = [0, 90, 180, 270]
         pairs = []
         match_count = 0
         # Choose one letter per task.
-        task_letter = random.choice(base_letters)
+        task_letter = self.rng.choice(base_letters)
+        matching = None if matches is None else set(self.rng.sample(range(2), matches))
 
-        for _ in range(2):
+        for i in range(2):
             # Each pair will now use the same `task_letter`
-            top_is_mirrored = random.choice([True, False])
+            top_is_mirrored = self.rng.choice([True, False])
             
             # 50% chance they are a rotatable match (both mirrored or both not)
-            if random.random() < 0.5:
+            if (self.rng.random() < 0.5) if matching is None else i in matching:
                 bottom_is_mirrored = top_is_mirrored
                 match_count += 1
             else:
                 bottom_is_mirrored = not top_is_mirrored
             
-            top_rotation = random.choice(rotations)
-            bottom_rotation = random.choice(rotations)
+            top_rotation = self.rng.choice(rotations)
+            bottom_rotation = self.rng.choice(rotations)
             
-            pairs.append({
-                'letter': task_letter, # Using the single letter for the task
-                'top_is_mirror': top_is_mirrored, 
-                'top_rot': top_rotation, 
-                'bottom_is_mirror': bottom_is_mirrored, 
-                'bottom_rot': bottom_rotation
-            })
+            pairs.append(SpatialPair(task_letter, top_is_mirrored, top_rotation, bottom_is_mirrored, bottom_rotation))
 
-        return {
-            "type": "Spatial Visualisation",
-            "pairs": pairs,
-            "options": [0, 1, 2],
-            "answer": match_count
-        }
\ No newline at end of file
+        return SpatialQuestion(tuple(pairs), match_count)
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+Typed records for questions and answers.
+
+Each task type has its own immutable, slotted record (a ``NamedTuple``), so building a
+question allocates one small tuple instead of a dict, and the same records can be used
+by the app, the server and headless tools such as replay.
+
+Every question record serialises three ways, with the per-type work done once at import:
+
+- ``to_json()``: the same text ``json.dumps`` gave for the old question dicts, so the
+  ``question_details`` column of existing debug logs still replays. ``to_dict()``
+  gives the same content as a dict.
+- ``to_csv_row()``: flat fields, matching the type's ``CSV_HEADER``.
+- ``to_bytes()``: a compact ``struct`` encoding; ``question_from_bytes`` reads it back.
+
+``TaskTally`` holds the running counts of a task in an array, so scoring at the end of
+a task does not have to walk the answers.
+"""
+import json
+import struct
+from array import array
+from operator import attrgetter
+from typing import NamedTuple, Tuple
+
+_encode = json.JSONEncoder().encode  # Same output as json.dumps with default settings
+_STR_LEN = struct.Struct('<H')
+
+
+def _compile_serializers(cls, keys, convert=None):
+    """
+    Gives ``cls`` ``to_dict`` and ``to_json``. ``keys`` are the attributes in the key
+    order of the old question dicts; ``convert`` maps a key to a function applied to its value.
+    """
+    keys = ('type',) + tuple(keys)
+    fetch = attrgetter(*keys)
+    if convert:
+        positions = [(keys.index(key), fn) for key, fn in convert.items()]
+
+        def to_dict(record):
+            values = list(fetch(record))
+            for i, fn in positions:
+                values[i] = fn(values[i])
+            return dict(zip(keys, values))
+    else:
+        def to_dict(record):
+            return dict(zip(keys, fetch(record)))
+
+    def to_json(record):
+        return _encode(to_dict(record))
+
+    cls.to_dict, cls.to_json = to_dict, to_json
+
+
+def _pack_strings(strings):
+    out = []
+    for s in strings:
+        data = s.encode('utf-8')
+        out.append(_STR_LEN.pack(len(data)))
+        out.append(data)
+    return b''.join(out)
+
+
+def _unpack_strings(data, offset, count):
+    strings = []
+    for _ in range(count):
+        (length,) = _STR_LEN.unpack_from(data, offset)
+        offset += _STR_LEN.size
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return strings, offset
+
+
+# --- Question records ---
+
+class ReasoningQuestion(NamedTuple):
+    statement: str
+    question: str
+    options: Tuple[str, str]
+    answer: str
+
+    type = 'Reasoning'
+    TAG = 1
+    CSV_HEADER = ('type', 'statement', 'question', 'option_1', 'option_2', 'answer')
+    _BIN = struct.Struct('<BB')  # tag, index of the answer among the options
+
+    def to_csv_row(self):
+        return [self.type, self.statement, self.question, *self.options, self.answer]
+
+    def to_bytes(self):
+        return self._BIN.pack(self.TAG, self.options.index(self.answer)) + _pack_strings((self.statement, self.question, *self.options))
+
+    @classmethod
+    def from_bytes(cls, data):
+        _, answer_index = cls._BIN.unpack_from(data)
+        (statement, question, *options), _ = _unpack_strings(data, cls._BIN.size, 4)
+        return cls(statement, question, tuple(options), options[answer_index])
+
+
+class PerceptualSpeedQuestion(NamedTuple):
+    pairs: Tuple[Tuple[str, str], ...]  # (top, bottom) characters
+    answer: int
+
+    type = 'Perceptual Speed'
+    options = (0, 1, 2, 3, 4)
+    TAG = 2
+    CSV_HEADER = ('type', 'pairs', 'answer')
+    _BIN = struct.Struct('<B8sB')  # tag, the four pairs' characters, answer
+
+    def to_csv_row(self):
+        return [self.type, ' '.join(top + bottom for top, bottom in self.pairs), self.answer]
+
+    def to_bytes(self):
+        return self._BIN.pack(self.TAG, ''.join(top + bottom for top, bottom in self.pairs).encode('ascii'), self.answer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _, chars, answer = cls._BIN.unpack_from(data)
+        chars = chars.decode('ascii')
+        return cls(tuple((chars[i], chars[i + 1]) for i in range(0, len(chars), 2)), answer)
+
+
+class NumberSpeedQuestion(NamedTuple):
+    options: Tuple[int, int, int]
+    answer: int
+
+    type = 'Number Speed & Accuracy'
+    TAG = 3
+    CSV_HEADER = ('type', 'option_1', 'option_2', 'option_3', 'answer')
+    _BIN = struct.Struct('<B3hh')
+
+    def to_csv_row(self):
+        return [self.type, *self.options, self.answer]
+
+    def to_bytes(self):
+        return self._BIN.pack(self.TAG, *self.options, self.answer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _, a, b, c, answer = cls._BIN.unpack_from(data)
+        return cls((a, b, c), answer)
+
+
+class WordMeaningQuestion(NamedTuple):
+    item: int  # Index of the word group in the lexicon
+    options: Tuple[str, str, str]
+    answer: str
+
+    type = 'Word Meaning'
+    TAG = 4
+    CSV_HEADER = ('type', 'item', 'option_1', 'option_2', 'option_3', 'answer')
+    _BIN = struct.Struct('<BIB')  # tag, item, index of the answer among the options
+
+    def to_csv_row(self):
+        return [self.type, self.item, *self.options, self.answer]
+
+    def to_bytes(self):
+        return self._BIN.pack(self.TAG, self.item, self.options.index(self.answer)) + _pack_strings(self.options)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _, item, answer_index = cls._BIN.unpack_from(data)
+        options, _ = _unpack_strings(data, cls._BIN.size, 3)
+        return cls(item, tuple(options), options[answer_index])
+
+
+class SpatialPair(NamedTuple):
+    letter: str
+    top_is_mirror: bool
+    top_rot: int
+    bottom_is_mirror: bool
+    bottom_rot: int
+
+
+class SpatialQuestion(NamedTuple):
+    pairs: Tuple[SpatialPair, ...]
+    answer: int
+
+    type = 'Spatial Visualisation'
+    options = (0, 1, 2)
+    TAG = 5
+    CSV_HEADER = ('type', 'letter', 'pair_1', 'pair_2', 'answer')
+    _BIN = struct.Struct('<Bc?H?H?H?HB')  # tag, letter, (mirror, rotation) x 4, answer
+
+    def to_csv_row(self):
+        # Each pair as "<top mirror><top rotation>/<bottom mirror><bottom rotation>", e.g. "M90/0180".
+        return [self.type, self.pairs[0].letter,
+                *(f"{'M' if p.top_is_mirror else '0'}{p.top_rot}/{'M' if p.bottom_is_mirror else '0'}{p.bottom_rot}" for p in self.pairs),
+                self.answer]
+
+    def to_bytes(self):
+        fields = []
+        for p in self.pairs:
+            fields += [p.top_is_mirror, p.top_rot, p.bottom_is_mirror, p.bottom_rot]
+        return self._BIN.pack(self.TAG, self.pairs[0].letter.encode('ascii'), *fields, self.answer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        _, letter, *fields, answer = cls._BIN.unpack_from(data)
+        letter = letter.decode('ascii')
+        pairs = tuple(SpatialPair(letter, *fields[i:i + 4]) for i in range(0, len(fields), 4))
+        return cls(pairs, answer)
+
+
+_compile_serializers(ReasoningQuestion, ('statement', 'question', 'options', 'answer'))
+_compile_serializers(PerceptualSpeedQuestion, ('pairs', 'options', 'answer'))
+_compile_serializers(NumberSpeedQuestion, ('options', 'answer'))
+_compile_serializers(WordMeaningQuestion, ('item', 'options', 'answer'))
+_compile_serializers(SpatialQuestion, ('pairs', 'options', 'answer'),
+                     convert={'pairs': lambda pairs: [p._asdict() for p in pairs]})
+
+QUESTION_TYPES = {cls.type: cls for cls in (ReasoningQuestion, PerceptualSpeedQuestion, NumberSpeedQuestion,
+                                            WordMeaningQuestion, SpatialQuestion)}
+_BY_TAG = {cls.TAG: cls for cls in QUESTION_TYPES.values()}
+
+
+def question_from_bytes(data):
+    return _BY_TAG[data[0]].from_bytes(data)
+
+
+def question_type_of(data):
+    """The task type of a binary question record, without decoding it."""
+    return _BY_TAG[data[0]].type
+
+
+# --- Answers ---
+
+class AnswerRecord(NamedTuple):
+    """One answer, as logged to the results log."""
+    task_name: str
+    is_correct: bool
+    time_taken_ms: float
+
+    def to_csv_row(self, timestamp):
+        return [timestamp, self.task_name, int(self.is_correct), f"{self.time_taken_ms:.2f}"]
+
+
+class TaskTally:
+    """Running answer counts of one task, updated per answer so that scoring is O(1)."""
+    __slots__ = ('_counts',)
+
+    ANSWERED, CORRECT = 0, 1
+
+    def __init__(self):
+        self._counts = array('q', [0, 0])
+
+    @classmethod
+    def from_answers(cls, answers):
+        tally = cls()
+        for is_correct in answers:
+            tally.record(is_correct)
+        return tally
+
+    def record(self, is_correct):
+        counts = self._counts
+        counts[self.ANSWERED] += 1
+        counts[self.CORRECT] += is_correct
+
+    @property
+    def answered(self):
+        return self._counts[self.ANSWERED]
+
+    @property
+    def correct(self):
+        return self._counts[self.CORRECT]
@@ -0,0 +1,135 @@
+"""
+Headless replay of logged sessions.
+
+Every question in the debug log carries the session seed and its index within the
+task, so a task can be regenerated with the same ``QuestionFactory`` stream and
+re-scored with the same ``score_task`` routine the app uses. Any difference in the
+questions, the correctness of the recorded answers or the logged summary means a
+generator or scoring change is not backwards compatible.
+
+Usage:
+    python src/replay.py [debug_log] [--summary-log PATH] [--workers N]
+"""
+import argparse
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import log_shards
+from config import CONFIG
+from question_factory import QuestionFactory
+from scoring import score_task
+
+_factory = None
+
+
+def _get_factory():
+    """One factory per worker process; ``new_session`` reseeds it without rebuilding the word lists."""
+    global _factory
+    if _factory is None:
+        _factory = QuestionFactory()
+    return _factory
+
+
+def load_sessions(debug_log):
+    """Groups debug log rows into ``{(seed, task_name): [row, ...]}`` ordered by question index."""
+    sessions = defaultdict(list)
+    for row in log_shards.iter_rows(debug_log):
+        if not row.get('session_seed') or not row.get('question_index'):
+            continue  # Written before seeds were recorded; cannot be replayed.
+        sessions[(int(row['session_seed']), row['task_name'])].append(row)
+    for rows in sessions.values():
+        rows.sort(key=lambda r: int(r['question_index']))
+    return sessions
+
+
+def load_summaries(summary_log):
+    """Maps ``(seed, task_name)`` to the logged summary row."""
+    summaries = {}
+    if not summary_log:
+        return summaries
+    for row in log_shards.iter_rows(summary_log):
+        if row.get('session_seed'):
+            summaries[(int(row['session_seed']), row['task_name'])] = row
+    return summaries
+
+
+def replay_task(seed, task_name, rows, summary=None):
+    """
+    Regenerates one task and checks it against the log.
+    Returns a list of human readable mismatch descriptions (empty when the replay matches).
+    """
+    factory = _get_factory()
+    factory.new_session(seed)
+    factory.begin_task(task_name)
+
+    mismatches = []
+    answered_correct = 0
+    expected_index = 0
+    for row in rows:
+        index = int(row['question_index'])
+        # Questions that were shown but not logged still consumed the stream.
+        while expected_index <= index:
+            question = factory.generate(task_name)
+            expected_index += 1
+
+        details = question.to_json()
+        if details != row['question_details']:
+            mismatches.append(f"question {index}: generated {details} but logged {row['question_details']}")
+            continue
+        is_correct = str(question.answer) == row['selected_answer']
+        if str(is_correct) != row['is_correct']:
+            mismatches.append(f"question {index}: scored {is_correct} but logged {row['is_correct']}")
+        answered_correct += is_correct
+
+    if summary is not None:
+        bank_size = int(summary['total_questions'])
+        stats = score_task(answered_correct, len(rows), bank_size, max_time=0, time_left=0,
+                           penalty=CONFIG["wrong_penalty"][task_name])
+        if answered_correct != int(summary['correct_questions']):
+            mismatches.append(f"summary: {answered_correct} correct but logged {summary['correct_questions']}")
+        if f"{stats['adjusted_score']:.2f}" != summary['adjusted_score']:
+            mismatches.append(f"summary: adjusted score {stats['adjusted_score']:.2f} but logged {summary['adjusted_score']}")
+
+    return mismatches
+
+
+def _replay_job(job):
+    seed, task_name, rows, summary = job
+    return seed, task_name, len(rows), replay_task(seed, task_name, rows, summary)
+
+
+def replay_log(debug_log, summary_log=None, workers=None):
+    """Replays every seeded task in ``debug_log`` in parallel. Yields ``(seed, task_name, n_questions, mismatches)``."""
+    sessions = load_sessions(debug_log)
+    summaries = load_summaries(summary_log)
+    jobs = [(seed, task, rows, summaries.get((seed, task))) for (seed, task), rows in sessions.items()]
+    if workers == 1:
+        yield from map(_replay_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_replay_job, jobs, chunksize=max(1, len(jobs) // 64))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay logged GIA sessions and verify questions and scores.")
+    parser.add_argument('debug_log', nargs='?', default='gia_debug_log.csv')
+    parser.add_argument('--summary-log', default=CONFIG["files"]["summary_log"])
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU).")
+    args = parser.parse_args(argv)
+
+    replayed, failed = 0, 0
+    for seed, task_name, n_questions, mismatches in replay_log(args.debug_log, args.summary_log, args.workers):
+        replayed += 1
+        if mismatches:
+            failed += 1
+            print(f"MISMATCH seed={seed} task={task_name} ({n_questions} questions):")
+            for mismatch in mismatches:
+                print(f"  - {mismatch}")
+
+    print(f"Replayed {replayed} tasks: {replayed - failed} matched, {failed} mismatched.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Spaced-repetition queue of missed questions.
+
+Every wrong answer puts the question in the queue under a canonical key: its binary
+record (see ``records``) with the options sorted, so the same question shown in a
+different order is the same item. Items are kept in one min-heap per task type,
+ordered by due time, so adding an item and popping the next due one are O(log n).
+
+An item climbs a ladder of review intervals (``CONFIG["review"]["intervals"]``): each
+correct review moves it one step up, a miss sends it back to the first step, and a
+correct answer on the last step retires it. That, plus a cap per task, keeps the queue
+small. It is persisted like the history index, as a JSON header followed by raw arrays
+already in heap order, so loading is a few reads and no sorting.
+"""
+import heapq
+import itertools
+import json
+import os
+import struct
+import time
+from array import array
+
+from config import CONFIG
+from records import QUESTION_TYPES, question_from_bytes, question_type_of
+
+QUEUE_VERSION = 1
+_DUE, _SEQ, _KEY, _STEP = range(4)
+
+
+def review_key(question):
+    """The canonical key of a question: its binary record with any options sorted."""
+    if 'options' in question._fields:
+        question = question._replace(options=tuple(sorted(question.options)))
+    return question.to_bytes()
+
+
+class ReviewQueue:
+    def __init__(self, path=None):
+        self.path = path or CONFIG["files"]["review"]
+        self.settings = CONFIG["review"]
+        self._heaps = {}      # task_name -> heap of [due, seq, key, step]; key is None once superseded
+        self._entries = {}    # key -> its live entry, queued or in flight
+        self._in_flight = {}  # key -> entry popped for review but not yet answered
+        self._seq = itertools.count()
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                if not isinstance(header, dict) or header.get('version') != QUEUE_VERSION:
+                    return
+                heaps = {}
+                for task_name, count, blob_size in header['tasks']:
+                    dues, steps, lengths = array('d'), array('B'), array('H')
+                    dues.fromfile(f, count)
+                    steps.fromfile(f, count)
+                    lengths.fromfile(f, count)
+                    blob = f.read(blob_size)
+                    if len(blob) != blob_size or sum(lengths) != blob_size:
+                        return  # Truncated or inconsistent: drop the queue rather than serve broken keys.
+                    heap, offset = [], 0
+                    for due, step, length in zip(dues, steps, lengths):
+                        key = blob[offset:offset + length]
+                        if question_type_of(key) != task_name:
+                            return
+                        heap.append([due, next(self._seq), key, step])
+                        offset += length
+                    heaps[task_name] = heap
+        except (OSError, ValueError, KeyError, TypeError, IndexError, EOFError):
+            return
+        # Saved in heap order, so the heaps are valid as read.
+        self._heaps = heaps
+        self._entries = {entry[_KEY]: entry for heap in heaps.values() for entry in heap}
+
+    def save(self):
+        """Returns unanswered in-flight items to the queue, compacts it and writes it out."""
+        self.release()
+        header = {'version': QUEUE_VERSION, 'tasks': []}
+        chunks = []
+        for task_name, heap in self._heaps.items():
+            live = [entry for entry in heap if entry[_KEY] is not None]
+            if len(live) > self.settings["max_items"]:
+                # Keep the items due soonest; the rest are the best-known ones.
+                for entry in heapq.nlargest(len(live) - self.settings["max_items"], live):
+                    del self._entries[entry[_KEY]]
+                live = heapq.nsmallest(self.settings["max_items"], live)
+            heapq.heapify(live)
+            self._heaps[task_name] = live
+            blob = b''.join(entry[_KEY] for entry in live)
+            header['tasks'].append([task_name, len(live), len(blob)])
+            chunks += [array('d', (e[_DUE] for e in live)), array('B', (e[_STEP] for e in live)),
+                       array('H', (len(e[_KEY]) for e in live)), blob]
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(json.dumps(header).encode() + b'\n')
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving review queue: {e}")
+
+    # --- Queue operations ---
+
+    def _push(self, key, due, step):
+        entry = [due, next(self._seq), key, step]
+        self._entries[key] = entry
+        heapq.heappush(self._heaps.setdefault(question_type_of(key), []), entry)
+
+    def _discard(self, key):
+        """Supersedes the queued entry for ``key``; it is skipped when it reaches the top of its heap."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry[_KEY] = None
+
+    def due_count(self, task_name, now=None):
+        """Number of items of ``task_name`` due by ``now``; visits only the due part of the heap."""
+        now = time.time() if now is None else now
+        heap = self._heaps.get(task_name, [])
+        count, stack = 0, [0] if heap else []
+        while stack:
+            i = stack.pop()
+            if heap[i][_DUE] > now:
+                continue
+            count += heap[i][_KEY] is not None
+            stack += [c for c in (2 * i + 1, 2 * i + 2) if c < len(heap)]
+        return count
+
+    def pop_due(self, task_name, rng=None, now=None):
+        """
+        Takes the most overdue item of ``task_name`` and returns it as a question (with its
+        options shuffled by ``rng``), or ``None`` if nothing is due.
+        """
+        now = time.time() if now is None else now
+        heap = self._heaps.get(task_name)
+        while True:
+            while heap and heap[0][_KEY] is None:
+                heapq.heappop(heap)
+            if not heap or heap[0][_DUE] > now:
+                return None
+            entry = heapq.heappop(heap)
+            try:
+                question = question_from_bytes(entry[_KEY])
+                break
+            except (struct.error, ValueError, KeyError, IndexError):
+                self._entries.pop(entry[_KEY], None)  # A damaged record; drop it and try the next one.
+        self._in_flight[entry[_KEY]] = entry
+        if rng is not None and 'options' in question._fields:
+            options = list(question.options)
+            rng.shuffle(options)
+            question = question._replace(options=tuple(options))
+        return question
+
+    def record(self, question, is_correct, now=None):
+        """Schedules a reviewed item's next review, or queues a newly missed question."""
+        if question.type not in QUESTION_TYPES:
+            return
+        now = time.time() if now is None else now
+        intervals = self.settings["intervals"]
+        key = review_key(question)
+        entry = self._in_flight.pop(key, None)
+        if entry is not None:
+            step = entry[_STEP] + 1 if is_correct else 0
+            if step >= len(intervals):
+                del self._entries[key]  # Retired: answered correctly at the longest interval.
+            else:
+                self._push(key, now + intervals[step], step)
+        elif not is_correct:
+            self._discard(key)
+            self._push(key, now + intervals[0], 0)
+
+    def release(self):
+        """Puts items that were popped but never answered back in the queue, due as before."""
+        for key, entry in self._in_flight.items():
+            heapq.heappush(self._heaps.setdefault(question_type_of(key), []), entry)
+        self._in_flight = {}
+
+    def __len__(self):
+        return len(self._entries)
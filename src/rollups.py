@@ -0,0 +1,144 @@
+"""
+Daily and weekly rollups of the summary history, plus LTTB downsampling.
+
+Rollups hold, per task and per day (or ISO week), the number of attempts and the
+sums of each metric, so a long-horizon progress chart never has to read the raw
+log. They are updated incrementally as attempts are logged and persisted next to
+the summary log; like the history index they are rebuilt if the log has changed
+underneath them.
+"""
+import json
+import os
+from datetime import date, timedelta
+
+import log_shards
+from history_index import METRICS, log_fingerprint
+
+ROLLUPS_VERSION = 1
+PERIODS = ('daily', 'weekly')
+
+
+def period_key(timestamp, period):
+    """``'2024-05-17 10:00:00'`` -> ``'2024-05-17'`` (daily) or the Monday of that week (weekly)."""
+    day = timestamp[:10]
+    if period == 'daily':
+        return day
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+class Rollups:
+    """``{period: {task: {period_start: [count, sum_accuracy, sum_spq, sum_adjusted]}}}``."""
+
+    def __init__(self, summary_log):
+        self.summary_log = summary_log
+        self.path = os.path.splitext(summary_log)[0] + '.rollups.json'
+        self._data = {period: {} for period in PERIODS}
+        self.fingerprint = None
+        if not self._load():
+            self.rebuild()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        fingerprint = log_fingerprint(self.summary_log)
+        if stored.get('version') != ROLLUPS_VERSION or stored.get('fingerprint') != fingerprint:
+            return False
+        self._data = {period: stored.get(period, {}) for period in PERIODS}
+        self.fingerprint = fingerprint
+        return True
+
+    def save(self):
+        stored = {'version': ROLLUPS_VERSION, 'fingerprint': self.fingerprint, **self._data}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(stored, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving rollups: {e}")
+
+    def _add(self, task_name, timestamp, values):
+        for period in PERIODS:
+            bucket = self._data[period].setdefault(task_name, {}).setdefault(
+                period_key(timestamp, period), [0] + [0.0] * len(METRICS))
+            bucket[0] += 1
+            for i, metric in enumerate(METRICS, start=1):
+                bucket[i] += values[metric]
+
+    def rebuild(self):
+        # As in the history index, fingerprint first so that rows appended meanwhile trigger another rebuild.
+        self.fingerprint = log_fingerprint(self.summary_log)
+        self._data = {period: {} for period in PERIODS}
+        for row in log_shards.iter_rows(self.summary_log):
+            try:
+                values = {metric: float(row[metric]) for metric in METRICS}
+                self._add(row['task_name'], row['timestamp'], values)
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.save()
+
+    def add(self, task_name, timestamp, values, row_bytes):
+        """
+        Adds one attempt just logged as ``row_bytes`` bytes of row data (``values`` maps
+        each metric to its logged value) and persists. Rebuilds instead if other rows were logged meanwhile.
+        """
+        expected = self.fingerprint + row_bytes
+        if log_fingerprint(self.summary_log) != expected:
+            self.rebuild()
+            return
+        self._add(task_name, timestamp, values)
+        self.fingerprint = expected
+        self.save()
+
+    def refresh(self):
+        """Rebuilds if rows have been logged (by any process) since the rollups were last brought up to date."""
+        if log_fingerprint(self.summary_log) != self.fingerprint:
+            self.rebuild()
+
+    def tasks(self):
+        return sorted(self._data['daily'])
+
+    def series(self, task_name, period='daily'):
+        """Returns ``(period_starts, {metric: means})`` in chronological order."""
+        buckets = self._data[period].get(task_name, {})
+        starts = sorted(buckets)
+        means = {metric: [buckets[s][i] / buckets[s][0] for s in starts]
+                 for i, metric in enumerate(METRICS, start=1)}
+        return starts, means
+
+
+def downsample_lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Keeps the first and last points and,
+    from each of ``threshold - 2`` buckets in between, the point forming the largest
+    triangle with the previously kept point and the average of the next bucket.
+    Returns the indices of the kept points.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    kept = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
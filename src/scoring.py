@@ -0,0 +1,37 @@
+def question_bank_size(duration_seconds, questions_per_minute):
+    """Number of questions available in a task of the given length."""
+    return max(1, round(duration_seconds / 60.0 * questions_per_minute))
+
+
+def score_task(answered_correct, total_answered, bank_size, max_time, time_left, penalty=None):
+    """
+    Computes the per-task stats shown on the summary screen.
+
+    This is the single scoring routine used by the app and by headless tools such as
+    the replay engine. Pass ``penalty=None`` for practice mode, where no adjusted
+    score is calculated.
+    """
+    stats = {}
+    answered_wrong = total_answered - answered_correct
+    not_answered = bank_size - total_answered
+    time_elapsed = max_time - max(0, time_left)
+
+    stats['question_bank_size'] = bank_size
+    stats['total_answered'] = total_answered
+    stats['answered_correct'] = answered_correct
+    stats['answered_wrong'] = answered_wrong
+    stats['not_answered'] = not_answered
+    stats['max_time'] = max_time
+    stats['time_elapsed'] = time_elapsed
+    stats['accuracy'] = (answered_correct / total_answered * 100) if total_answered > 0 else 0
+    stats['spq'] = (time_elapsed / total_answered) if total_answered > 0 else 0
+
+    if penalty is None:
+        stats['adjusted_score'] = 'N/A'
+        stats['score_percentage'] = 'N/A'
+    else:
+        # Adjusted score penalizes wrong AND unanswered questions
+        stats['adjusted_score'] = answered_correct + (answered_wrong + not_answered) * penalty
+        stats['score_percentage'] = (max(0, stats['adjusted_score']) / bank_size * 100) if bank_size > 0 else 0
+
+    return stats
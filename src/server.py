@@ -0,0 +1,301 @@
+"""
+Multi-candidate test server.
+
+Serves timed tasks to many candidates at once over a small JSON-over-HTTP API,
+using the same ``QuestionFactory`` streams, deadlines and ``score_task`` scoring as
+the desktop app. Each candidate's results go to their own set of CSV logs under
+``--log-root``, written in batches from a background thread.
+
+API (all bodies are JSON; connections are kept alive):
+    POST /sessions               {"candidate": "...", "task_name": "..."}
+                                 -> {"session_id", "question", "time_left", "question_bank_size"}
+    POST /sessions/<id>/answer   {"answer": ...}
+                                 -> {"correct", "question" | "stats", "time_left"}
+    GET  /sessions/<id>          -> {"finished", "time_left", "stats"?}
+
+Usage:
+    python src/server.py [--host 127.0.0.1] [--port 8765] [--log-root candidates]
+"""
+import argparse
+import asyncio
+import copy
+import os
+import re
+import secrets
+from collections import OrderedDict
+
+from config import CONFIG
+from data_manager import DataManager
+from json_http import HttpError, JsonHttpServer
+from question_factory import QuestionFactory
+from records import AnswerRecord
+from scoring import question_bank_size, score_task
+
+MAX_SESSIONS = 2000
+FINISHED_SESSION_TTL = 300  # Seconds a finished session's stats stay available.
+FLUSH_INTERVAL = 0.5
+FLUSH_BATCH_SIZE = 1000
+MAX_OPEN_DATA_MANAGERS = 256
+
+# Candidate ids become directory names, so they may not start with a dot.
+_CANDIDATE_RE = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$')
+
+
+class Session:
+    """State of one candidate's task. Only counters are kept, so memory does not grow with answers."""
+    __slots__ = ('session_id', 'candidate', 'task_name', 'factory', 'seed', 'question', 'question_sent_at',
+                 'bank_size', 'max_time', 'deadline', 'answered', 'correct', 'stats', 'expiry_handle')
+
+    def __init__(self, session_id, candidate, task_name, factory, max_time, bank_size, now):
+        self.session_id = session_id
+        self.candidate = candidate
+        self.task_name = task_name
+        self.factory = factory
+        self.seed = factory.seed
+        self.question = None
+        self.question_sent_at = now
+        self.bank_size = bank_size
+        self.max_time = max_time
+        self.deadline = now + max_time
+        self.answered = 0
+        self.correct = 0
+        self.stats = None
+        self.expiry_handle = None
+
+    def time_left(self, now):
+        return max(0.0, self.deadline - now)
+
+
+class LogWriter:
+    """
+    Buffers log records in memory and writes them in batches on a worker thread,
+    reusing one ``DataManager`` per candidate from a bounded LRU pool.
+    """
+
+    def __init__(self, log_root):
+        self.log_root = log_root
+        self._pending_results = {}
+        self._pending_summaries = []
+        self._pending_count = 0
+        self._managers = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._write_lock = asyncio.Lock()  # One batch at a time, so rows never interleave in a CSV
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        # Let the loop finish the write it may be in the middle of rather than cancelling
+        # it: cancelling would not stop the executor thread that is doing the writing.
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await self.flush()
+        for manager in self._managers.values():
+            manager.compact()
+
+    def log_answer(self, candidate, task_name, is_correct, time_taken_ms):
+        self._pending_results.setdefault(candidate, []).append(AnswerRecord(task_name, is_correct, time_taken_ms))
+        self._note_pending()
+
+    def log_summary(self, candidate, session):
+        penalty = CONFIG["wrong_penalty"][session.task_name]
+        time_elapsed = session.stats['time_elapsed']
+        self._pending_summaries.append((candidate, session.task_name, session.bank_size, session.correct,
+                                        time_elapsed, penalty, session.seed))
+        self._note_pending()
+
+    def _note_pending(self):
+        self._pending_count += 1
+        if self._pending_count >= FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._closing:
+                await self.flush()
+
+    async def flush(self):
+        async with self._write_lock:
+            if not self._pending_count:
+                return
+            results, summaries = self._pending_results, self._pending_summaries
+            self._pending_results, self._pending_summaries, self._pending_count = {}, [], 0
+            await asyncio.get_running_loop().run_in_executor(None, self._write, results, summaries)
+
+    def _write(self, results, summaries):
+        try:
+            for candidate, records in results.items():
+                self._manager(candidate).log_question_results(records)
+            for candidate, task_name, total, correct, duration, penalty, seed in summaries:
+                self._manager(candidate).log_summary_stats(task_name, total, correct, duration, penalty, session_seed=seed)
+        except OSError as e:
+            print(f"Error writing candidate logs: {e}")
+
+    def _manager(self, candidate):
+        manager = self._managers.pop(candidate, None)
+        if manager is None:
+            directory = os.path.join(self.log_root, candidate)
+            os.makedirs(directory, exist_ok=True)
+            manager = DataManager(
+                os.path.join(directory, CONFIG["files"]["results_log"]),
+                os.path.join(directory, CONFIG["files"]["summary_log"]),
+                debug_log=os.path.join(directory, 'gia_debug_log.csv'),
+            )
+            if len(self._managers) >= MAX_OPEN_DATA_MANAGERS:
+                _, evicted = self._managers.popitem(last=False)
+                evicted.compact()
+        self._managers[candidate] = manager
+        return manager
+
+
+class TestServer(JsonHttpServer):
+    """Owns the live sessions and implements the API on top of ``JsonHttpServer``."""
+
+    def __init__(self, log_root, max_sessions=MAX_SESSIONS):
+        self.sessions = {}
+        self.max_sessions = max_sessions
+        self.writer = LogWriter(log_root)
+        # The word lists are shared by every session; each copy only owns its RNG and deck.
+        self._base_factory = QuestionFactory()
+
+    # --- Session logic ---
+
+    def start_session(self, candidate, task_name):
+        if not isinstance(candidate, str) or not _CANDIDATE_RE.match(candidate):
+            raise HttpError(400, "candidate must be 1-64 letters, digits, '.', '_' or '-' and not start with '.'")
+        if task_name not in CONFIG["task_durations"]:
+            raise HttpError(400, f"unknown task_name {task_name!r}")
+        if len(self.sessions) >= self.max_sessions:
+            raise HttpError(503, "server is at capacity")
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        factory = copy.copy(self._base_factory)
+        factory.new_session()
+        factory.begin_task(task_name)
+        max_time = CONFIG["task_durations"][task_name]
+        bank_size = question_bank_size(max_time, CONFIG["questions_per_minute"])
+
+        session = Session(secrets.token_hex(8), candidate, task_name, factory, max_time, bank_size, now)
+        session.expiry_handle = loop.call_at(session.deadline, self._finish, session)
+        self.sessions[session.session_id] = session
+        self._next_question(session, now)
+        return {
+            'session_id': session.session_id,
+            'question': self._public_question(session.question),
+            'time_left': session.time_left(now),
+            'question_bank_size': bank_size,
+        }
+
+    def answer(self, session_id, answer):
+        session = self._get(session_id)
+        now = asyncio.get_running_loop().time()
+        if session.stats is not None:
+            return {'finished': True, 'stats': session.stats, 'time_left': 0.0}
+        if now >= session.deadline:
+            # The expiry callback has not run yet; the answer arrived too late either way.
+            self._finish(session)
+            return {'finished': True, 'stats': session.stats, 'time_left': 0.0}
+
+        is_correct = answer == session.question.answer
+        session.answered += 1
+        session.correct += is_correct
+        self.writer.log_answer(session.candidate, session.task_name, is_correct,
+                               (now - session.question_sent_at) * 1000)
+
+        response = {'correct': is_correct}
+        if session.answered >= session.bank_size:
+            self._finish(session)
+            response.update(finished=True, stats=session.stats, time_left=0.0)
+        else:
+            self._next_question(session, now)
+            response.update(finished=False, question=self._public_question(session.question),
+                            time_left=session.time_left(now))
+        return response
+
+    def status(self, session_id):
+        session = self._get(session_id)
+        now = asyncio.get_running_loop().time()
+        response = {'finished': session.stats is not None, 'time_left': session.time_left(now),
+                    'answered': session.answered}
+        if session.stats is not None:
+            response['stats'] = session.stats
+        return response
+
+    def _get(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "unknown session")
+        return session
+
+    def _next_question(self, session, now):
+        session.question = session.factory.generate(session.task_name)
+        session.question_sent_at = now
+
+    @staticmethod
+    def _public_question(question):
+        public = question.to_dict()
+        del public['answer']
+        return public
+
+    def _finish(self, session):
+        if session.stats is not None:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if session.expiry_handle is not None:
+            session.expiry_handle.cancel()
+        penalty = CONFIG["wrong_penalty"][session.task_name]
+        session.stats = score_task(session.correct, session.answered, session.bank_size,
+                                   session.max_time, session.time_left(now), penalty)
+        # Drop the RNG and word deck; only the stats are kept until the session expires.
+        session.question = None
+        session.factory = None
+        self.writer.log_summary(session.candidate, session)
+        session.expiry_handle = loop.call_later(FINISHED_SESSION_TTL, self.sessions.pop, session.session_id, None)
+
+    # --- HTTP plumbing ---
+
+    def route(self, method, path, body):
+        parts = [p for p in path.split('/') if p]
+        if method == 'POST' and parts == ['sessions']:
+            return self.start_session(body.get('candidate'), body.get('task_name'))
+        if method == 'POST' and len(parts) == 3 and parts[0] == 'sessions' and parts[2] == 'answer':
+            if 'answer' not in body:
+                raise HttpError(400, "missing answer")
+            return self.answer(parts[1], body['answer'])
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'sessions':
+            return self.status(parts[1])
+        raise HttpError(404, "not found")
+
+    async def start(self):
+        self.writer.start()
+
+    async def stop(self):
+        await self.writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve GIA tasks to many candidates at once.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--log-root', default='candidates', help="Directory holding one log folder per candidate.")
+    parser.add_argument('--max-sessions', type=int, default=MAX_SESSIONS)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(TestServer(args.log_root, args.max_sessions).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Crash-safe journal of the test series in progress.
+
+The journal is an append-only file of JSON lines: one record when a series starts,
+one per task start, one per answer and one per task end. Appending only queues the
+line; a background writer thread writes whatever has queued up and fsyncs it as one
+group commit, so the cost on the answer path is a few microseconds. Task ends are
+committed synchronously because their summaries feed the logs.
+
+When the series finishes the journal is compacted to a single ``done`` record. On
+launch, ``recover`` reads the file once, front to back, and returns the state of an
+unfinished series so the app can pick it up at the right task and question.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+COMMIT_INTERVAL = 0.2  # Seconds the writer waits for more records before committing
+
+
+class SessionJournal:
+    def __init__(self, path, commit_interval=COMMIT_INTERVAL):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._fd = None
+        self._thread = None
+
+    # --- Writing ---
+
+    def reopen(self):
+        """Continues appending to the journal of a recovered series."""
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='session-journal', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Give the next few answers a chance to join this commit.
+            self._closed.wait(self.commit_interval)
+            self.flush()
+
+    def append(self, record, sync=False):
+        """Queues a record; with ``sync=True`` it is on disk when this returns."""
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._pending_lock:
+            self._pending.append(line)
+        if sync:
+            self.flush()
+        else:
+            self._wake.set()
+
+    def flush(self):
+        """Writes and fsyncs everything queued so far as one commit."""
+        with self._io_lock:
+            with self._pending_lock:
+                lines, self._pending = self._pending, []
+            if not lines or self._fd is None:
+                return
+            try:
+                os.write(self._fd, ''.join(lines).encode('utf-8'))
+                os.fsync(self._fd)
+            except OSError as e:
+                print(f"Error writing session journal: {e}")
+
+    def _replace(self, records):
+        """Atomically swaps the journal for ``records``, dropping anything still queued."""
+        with self._io_lock:
+            with self._pending_lock:
+                self._pending = []
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w') as f:
+                    f.writelines(json.dumps(r, separators=(',', ':')) + '\n' for r in records)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"Error rewriting session journal: {e}")
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self.flush()
+        with self._io_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    # --- Series events ---
+
+    def begin_series(self, seed, task_order, task_durations, wrong_penalty, debug_logging_enabled):
+        self._replace([{
+            'type': 'series', 'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'seed': seed,
+            'task_order': task_order, 'task_durations': task_durations,
+            'wrong_penalty': wrong_penalty, 'debug_logging_enabled': debug_logging_enabled,
+        }])
+        self.reopen()
+
+    def begin_task(self, task_name):
+        self.append({'type': 'task', 'task': task_name})
+
+    def answer(self, is_correct, time_left):
+        self.append({'type': 'answer', 'correct': int(is_correct), 'time_left': time_left})
+
+    def end_task(self, task_summary):
+        self.append({'type': 'end', 'summary': task_summary}, sync=True)
+
+    def finish(self, status='complete'):
+        """Compacts the journal of a finished (or abandoned) series to a single record."""
+        self._replace([{'type': 'done', 'status': status}])
+
+    # --- Recovery ---
+
+    def recover(self):
+        """
+        Returns the state of a series that was never finished, or ``None``. The state
+        holds the ``series`` record, the ``completed`` task summaries and, if a task was
+        under way, ``current`` = ``{'task', 'answers', 'time_left'}``.
+        """
+        state = None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # A torn final write; everything before it is intact.
+                    kind = record.get('type')
+                    if kind == 'series':
+                        state = {'series': record, 'completed': [], 'current': None}
+                    elif state is None:
+                        continue
+                    elif kind == 'task':
+                        state['current'] = {'task': record['task'], 'answers': [], 'time_left': None}
+                    elif kind == 'answer' and state['current']:
+                        state['current']['answers'].append(bool(record['correct']))
+                        state['current']['time_left'] = record['time_left']
+                    elif kind == 'end':
+                        state['completed'].append(record['summary'])
+                        state['current'] = None
+                    elif kind == 'done':
+                        state = None
+        except OSError:
+            return None
+        return state
@@ -0,0 +1,198 @@
+"""
+Background sync of local logs to a central results store.
+
+For every log the syncer remembers a high-water mark: the timestamp of the last row
+uploaded and the keys of the rows uploaded at that timestamp. Each pass reads only
+the rows at or after the mark (see ``log_shards.iter_rows_since``) and posts them in
+gzip-compressed batches. Every row carries a content-derived key, so a batch that is
+sent twice (for example after a timeout) is deduplicated by the server.
+
+All network work happens on a daemon thread; the app only ever calls ``trigger``.
+"""
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+import log_shards
+from config import CONFIG
+
+SETTLE_SECONDS = 2  # Rows this recent are left for the next pass, so late writers in the same second are not skipped.
+BASE_BACKOFF = 2.0
+MAX_BACKOFF = 300.0
+REQUEST_TIMEOUT = 15
+
+
+class SyncError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a ``Retry-After`` header, given as seconds or as an HTTP date.
+    Capped at ``MAX_BACKOFF``; ``None`` if the header is missing or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    if seconds != seconds:  # NaN
+        return None
+    return min(MAX_BACKOFF, max(0.0, seconds))
+
+
+def row_key(log_name, row, ordinal):
+    """Stable id of a row: its content plus how many identical rows precede it."""
+    content = '\x1f'.join([log_name, str(ordinal)] + [f"{k}={v}" for k, v in row.items()])
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class LogSyncer:
+    """Uploads new rows of a ``DataManager``'s logs to ``url`` from a background thread."""
+
+    def __init__(self, data_manager, url, state_path='gia_sync_state.json', interval=None, batch_size=None):
+        settings = CONFIG["sync"]
+        self.url = url.rstrip('/')
+        self.state_path = state_path
+        self.interval = interval or settings["interval"]
+        self.batch_size = batch_size or settings["batch_size"]
+        self.logs = {
+            'results': data_manager.results_log,
+            'summary': data_manager.summary_log,
+            'debug': data_manager.debug_log,
+        }
+        self.state = self._load_state()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- State ---
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get('client_id'):
+                state.setdefault('marks', {})
+                return state
+        except (OSError, ValueError):
+            pass
+        return {'client_id': uuid.uuid4().hex, 'marks': {}}
+
+    def _save_state(self):
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+    # --- Thread control ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-sync', daemon=True)
+        self._thread.start()
+        return self
+
+    def trigger(self):
+        """Asks for a sync pass soon. Never blocks."""
+        self._wake.set()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        failures = 0
+        delay = 0.0
+        while not self._stop.is_set():
+            self._wake.wait(delay if failures else self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.sync_once()
+                failures = 0
+            except Exception as e:
+                # Anything unexpected is retried like a network error; the thread must not die.
+                failures += 1
+                retry_after = getattr(e, 'retry_after', None)
+                backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (failures - 1))
+                # Full jitter spreads retries from many clients after a server outage.
+                delay = max(retry_after or 0, random.uniform(0, backoff))
+                reason = e if isinstance(e, (SyncError, OSError)) else f"{type(e).__name__}: {e}"
+                print(f"Log sync failed ({reason}); retrying in {delay:.0f}s.")
+
+    # --- Sync ---
+
+    def pending_rows(self, log_name):
+        """Rows of ``log_name`` after its high-water mark, as ``(key, row)`` pairs in timestamp order."""
+        mark = self.state['marks'].get(log_name, {'timestamp': '', 'keys': []})
+        uploaded = set(mark['keys'])
+        cutoff = (datetime.now() - timedelta(seconds=SETTLE_SECONDS)).strftime('%Y-%m-%d %H:%M:%S')
+        seen = {}
+        pending = []
+        for row in log_shards.iter_rows_since(self.logs[log_name], mark['timestamp']):
+            if (row.get('timestamp') or '') >= cutoff:
+                break
+            content = tuple(row.items())
+            ordinal = seen.get(content, 0)
+            seen[content] = ordinal + 1
+            key = row_key(log_name, row, ordinal)
+            if row['timestamp'] == mark['timestamp'] and key in uploaded:
+                continue
+            pending.append((key, row))
+        return pending
+
+    def sync_once(self):
+        """Uploads everything pending. Returns the number of rows the server accepted as new."""
+        accepted = 0
+        for log_name in self.logs:
+            pending = self.pending_rows(log_name)
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                accepted += self._upload(log_name, batch)
+                self._advance_mark(log_name, batch)
+                self._save_state()
+        return accepted
+
+    def _advance_mark(self, log_name, batch):
+        mark = self.state['marks'].setdefault(log_name, {'timestamp': '', 'keys': []})
+        for key, row in batch:
+            if row['timestamp'] != mark['timestamp']:
+                mark['timestamp'], mark['keys'] = row['timestamp'], []
+            mark['keys'].append(key)
+
+    def _upload(self, log_name, batch):
+        payload = {
+            'client_id': self.state['client_id'],
+            'log': log_name,
+            'rows': [{'key': key, 'row': row} for key, row in batch],
+        }
+        request = urllib.request.Request(
+            f"{self.url}/ingest",
+            data=gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8')),
+            headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                return json.load(response).get('accepted', 0)
+        except urllib.error.HTTPError as e:
+            raise SyncError(f"HTTP {e.code}", parse_retry_after(e.headers.get('Retry-After'))) from e
+        except (urllib.error.URLError, ValueError) as e:
+            raise SyncError(str(e)) from e
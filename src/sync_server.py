@@ -0,0 +1,150 @@
+"""
+Reference results store for log sync.
+
+A stand-in for the central store, for testing ``sync.LogSyncer`` offline. Rows are
+kept in SQLite keyed by ``(client_id, log, key)`` and inserted with
+``INSERT OR IGNORE``, so re-sent batches are harmless. Requests from all clients are
+queued and committed together in one transaction per flush on a single writer
+thread. When the queue is too deep, clients get 503 with ``Retry-After`` and back off.
+
+Usage:
+    python src/sync_server.py [--port 8766] [--db gia_results_store.sqlite3]
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from json_http import HttpError, JsonHttpServer
+
+MAX_QUEUED_ROWS = 200_000
+MAX_ROWS_PER_REQUEST = 5000
+FLUSH_INTERVAL = 0.05
+LOGS = ('results', 'summary', 'debug')
+
+
+class SyncStoreServer(JsonHttpServer):
+    max_body_bytes = 16 * 1024 * 1024
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._conn = None
+        self._queue = []
+        self._queued_rows = 0
+        self._wakeup = None
+        self._flusher = None
+
+    # --- Storage (runs on the writer thread) ---
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " client_id TEXT NOT NULL, log TEXT NOT NULL, key TEXT NOT NULL,"
+            " timestamp TEXT, data TEXT NOT NULL,"
+            " PRIMARY KEY (client_id, log, key)) WITHOUT ROWID"
+        )
+        conn.commit()
+        return conn
+
+    def _write(self, requests):
+        """Inserts every queued request in one transaction; returns the new-row count per request."""
+        counts = []
+        with self._conn:
+            for client_id, log, rows in requests:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO rows (client_id, log, key, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                    [(client_id, log, r['key'], r['row'].get('timestamp'), json.dumps(r['row'])) for r in rows],
+                )
+                counts.append(self._conn.total_changes - before)
+        return counts
+
+    def _count(self):
+        return dict(self._conn.execute("SELECT log, COUNT(*) FROM rows GROUP BY log").fetchall())
+
+    # --- Server lifecycle ---
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, self._open)
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flusher:
+            self._flusher.cancel()
+        if self._queue:
+            await self._flush()
+        self._executor.submit(self._conn.close).result()
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let concurrent requests pile up briefly so they share one commit.
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self._flush()
+
+    async def _flush(self):
+        queue, self._queue, self._queued_rows = self._queue, [], 0
+        try:
+            counts = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._write, [request for request, _ in queue])
+        except sqlite3.Error as e:
+            for _, future in queue:
+                future.set_exception(HttpError(503, f"store error: {e}", {'Retry-After': '5'}))
+            return
+        for (_, future), count in zip(queue, counts):
+            future.set_result(count)
+
+    # --- API ---
+
+    def route(self, method, path, body):
+        if method == 'POST' and path == '/ingest':
+            return self.ingest(body)
+        if method == 'GET' and path == '/stats':
+            return self.stats()
+        raise HttpError(404, "not found")
+
+    async def ingest(self, body):
+        client_id, log, rows = body.get('client_id'), body.get('log'), body.get('rows')
+        if not isinstance(client_id, str) or not client_id or log not in LOGS or not isinstance(rows, list):
+            raise HttpError(400, "expected client_id, log and rows")
+        if len(rows) > MAX_ROWS_PER_REQUEST:
+            raise HttpError(413, f"at most {MAX_ROWS_PER_REQUEST} rows per request")
+        if not all(isinstance(r, dict) and isinstance(r.get('key'), str) and isinstance(r.get('row'), dict) for r in rows):
+            raise HttpError(400, "each row needs a key and a row object")
+        if self._queued_rows + len(rows) > MAX_QUEUED_ROWS:
+            raise HttpError(503, "store is busy", {'Retry-After': '2'})
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(((client_id, log, rows), future))
+        self._queued_rows += len(rows)
+        self._wakeup.set()
+        accepted = await future
+        return {'accepted': accepted, 'duplicates': len(rows) - accepted}
+
+    async def stats(self):
+        counts = await asyncio.get_running_loop().run_in_executor(self._executor, self._count)
+        return {'rows': counts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reference results store for GIA log sync.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--db', default='gia_results_store.sqlite3')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(SyncStoreServer(args.db).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()